@@ -1,6 +1,6 @@
-from . import _mainAES
-from . import _mainAES_192
-from . import _mainAES_256
+from . import _tableAES
+from . import _key_schedule
+from ._AES_ECB import _BlockContext, pkcs7_pad, pkcs7_unpad
 import os
 
 def bytes_to_int(b):
@@ -9,77 +9,84 @@ def bytes_to_int(b):
 def int_to_bytes(i, length=16):
     return i.to_bytes(length, 'big')
 
-def list_to_int(l):
-    return bytes_to_int(bytes(l))
-
 def xor_bytes(a, b):
-    return bytes(x ^ y for x, y in zip(a, b))
-
-def pkcs7_pad(data):
-    pad_len = 16 - (len(data) % 16)
-    return data + bytes([pad_len] * pad_len)
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
 
 def AES_CBC_encrypt(plaintext, key_length):
-    if isinstance(plaintext, str):
-        plaintext_bytes = plaintext.encode('utf-8')
-    else:
-        plaintext_bytes = plaintext
-
-    if key_length == 128:
-        aes_module = _mainAES
-    elif key_length == 192:
-        aes_module = _mainAES_192
-    elif key_length == 256:
-        aes_module = _mainAES_256
-    else:
+    if key_length not in (128, 192, 256):
         raise ValueError("Invalid key length")
 
     key_bytes = os.urandom(key_length // 8)
-    key = bytes_to_int(key_bytes)
+    schedule = _key_schedule.get_key_schedule(key_bytes, key_length)
     iv = os.urandom(16)
 
-    def encrypt_block_get_bytes(input_bytes, key_int):
-        raw_output = aes_module.main(input_bytes, key_int)
-        
-        flat_list = []
-        is_matrix = isinstance(raw_output, list) and len(raw_output) == 4 and isinstance(raw_output[0], list)
-        
-        if is_matrix:
-            for row in raw_output:
-                flat_list.extend(row)
-        else:
-            flat_list = raw_output
-
-        final_list = []
-        for x in flat_list:
-            if isinstance(x, str):
-                final_list.append(int(x, 16))
-            else:
-                final_list.append(x)
-                
-        return bytes(final_list)
-
-    padded_text = pkcs7_pad(plaintext_bytes)
-    ciphertext = bytearray()
-    
-    previous_block = iv
-
-    for i in range(0, len(padded_text), 16):
-        current_block = padded_text[i:i+16]
-        
-        xor_input = xor_bytes(current_block, previous_block)
-        
-        encrypted_block = encrypt_block_get_bytes(xor_input, key)
-        
-        ciphertext.extend(encrypted_block)
-        previous_block = encrypted_block
-
-    return bytes(ciphertext), hex(key)[2:], iv
-
-plaintext_input = "Hello, World!"
-key_len = 128
-
-cipher_text, key, iv = AES_CBC_encrypt(plaintext_input, key_len)
+    return encrypt_with_schedule(plaintext, schedule, iv), hex(schedule.key_int)[2:], iv
+
+def encrypt_with_schedule(plaintext, schedule, iv):
+    if isinstance(plaintext, str):
+        plaintext_bytes = plaintext.encode('utf-8')
+    else:
+        plaintext_bytes = plaintext
+
+    encryptor = CBCEncryptor(schedule, iv)
+    return bytes(encryptor.update(plaintext_bytes) + encryptor.finalize())
+
+class CBCEncryptor(_BlockContext):
+    # łańcuch CBC (poprzedni blok szyfrogramu) przechodzi między kolejnymi wywołaniami update();
+    # XOR z poprzednim blokiem robi _tableAES na słowach, szyfrogram trafia od razu do bufora wyjściowego
+    def __init__(self, schedule, iv):
+        if len(iv) != 16:
+            raise ValueError("IV dla CBC musi mieć 16 bajtów.")
+        super().__init__()
+        self._schedule = schedule
+        self._previous_block = bytes(iv)
+
+    def _process(self, source, out, out_offset, length):
+        _tableAES.encrypt_blocks_into(source, self._schedule, out, out_offset, length, chain=self._previous_block)
+        self._previous_block = bytes(out[out_offset + length - 16:out_offset + length])
+
+    def finalize(self):
+        last = pkcs7_pad(bytes(self._close()))
+        out = bytearray(len(last))
+        self._process(last, out, 0, len(last))
+        return out
+
+class CBCDecryptor(_BlockContext):
+    # każdy blok tekstu jawnego zależy tylko od dwóch bloków szyfrogramu, więc cały kawałek idzie do decrypt_blocks_into naraz;
+    # ostatni blok jest wstrzymywany do finalize(), żeby zdjąć padding
+    hold_back = True
+
+    def __init__(self, schedule, iv):
+        if len(iv) != 16:
+            raise ValueError("IV dla CBC musi mieć 16 bajtów.")
+        super().__init__()
+        self._schedule = schedule
+        self._previous_block = bytes(iv)
+
+    def _process(self, source, out, out_offset, length):
+        _tableAES.decrypt_blocks_into(source, self._schedule, out, out_offset, length, chain=self._previous_block)
+        self._previous_block = bytes(source[length - 16:length])
+
+    def finalize(self):
+        last = self._close()
+        if len(last) != 16:
+            raise ValueError("Niepoprawna długość szyfrogramu CBC.")
+        out = bytearray(16)
+        self._process(last, out, 0, 16)
+        return pkcs7_unpad(out)
+
+def decrypt_with_schedule(ciphertext, schedule, iv):
+    decryptor = CBCDecryptor(schedule, iv)
+    return bytes(decryptor.update(ciphertext) + decryptor.finalize())
+
+def AES_CBC_decrypt(ciphertext, key_length, key, iv):
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    return decrypt_with_schedule(ciphertext, schedule, iv)
+
+#plaintext_input = "Hello, World!"
+#key_len = 128
+
+#cipher_text, key, iv = AES_CBC_encrypt(plaintext_input, key_len)
 
 #print(f"Plaintext (hex):  {plaintext_input.encode('utf-8').hex()}")
 #print(f"Key (hex):        {key}")
@@ -1,48 +1,131 @@
-from . import _mainAES
-from . import _mainAES_192
-from . import _mainAES_256
+from . import _tableAES
+from . import _key_schedule
 import os
 
 def AES_ECB_encrypt(plaintext, key_length): # plaintext to string, key to 128 bitowy ciąg (defacto int)
+    if key_length not in (128, 192, 256):
+        raise ValueError("Invalid key length")
+
+    key = os.urandom(key_length // 8)
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+
+    return encrypt_with_schedule(plaintext, schedule), key.hex()
+
+def encrypt_with_schedule(plaintext, schedule): # schedule to gotowy KeySchedule -> klucz nie jest rozszerzany ponownie
     if isinstance(plaintext, str):
         input = plaintext.encode('utf-8')
     else: input = plaintext
     # zamiana na bajty
 
-    key_bytes_len = key_length // 8
+    encryptor = ECBEncryptor(schedule)
+    return bytes(encryptor.update(input) + encryptor.finalize())
 
-    key = os.urandom(key_bytes_len)
-    key_int = int.from_bytes(key, 'big')
+def pkcs7_pad(data):
     # padding -> w standardzie PKCS#7
-
-    if len(input) % 16 != 0:
-        padding_length = 16 - (len(input) % 16)
-        input += bytes([padding_length] * padding_length)
-    else:
-        padding_length = 16 # tutaj mimo wszystko dodaję cały blok, ponieważ muszę jakoś wiedzieć na końcu gdzie był padding
-        input += bytes([padding_length] * padding_length)
+    # jeśli dane są wyrównane do 16 bajtów to i tak dodaję cały blok, ponieważ muszę jakoś wiedzieć na końcu gdzie był padding
     # czyli jeśli np. padding ma długość 5 to dodaje 5 bajtów o wartości 0x05 -> czyli 5 bajtów po 5
-    # wszystko po to żeby pracować na blokach 16 bajtowych
-    output = []
-    if key_bytes_len == 16: # AES-128
-        for i in range(0, len(input), 16):  # krok co 16 bajtów
-            output += _mainAES.main(input[i:i+16], key_int) # w tym miejscu i jest indeksem pierwszego bajtu bloku 16 bajtowego -> nie jest indeksem każdego kolejnego bajtu!
-    elif key_bytes_len == 24: # AES-192
-        for i in range(0, len(input), 16):
-            output += _mainAES_192.main(input[i:i+16], key_int)
-    elif key_bytes_len == 32: # AES-256
-        for i in range(0, len(input), 16):
-            output += _mainAES_256.main(input[i:i+16], key_int)
-    flat_output = []
-    for item in output:
-        if isinstance(item, list):
-            flat_output.extend(item)
+    padding_length = 16 - (len(data) % 16)
+    return bytes(data) + bytes([padding_length] * padding_length)
+
+def pkcs7_unpad(data):
+    if len(data) == 0 or len(data) % 16 != 0:
+        raise ValueError("Niepoprawny padding PKCS#7.")
+    padding_length = data[-1]
+    if padding_length < 1 or padding_length > 16 or data[-padding_length:] != bytes([padding_length] * padding_length):
+        raise ValueError("Niepoprawny padding PKCS#7.")
+    return data[:-padding_length]
+
+class _BlockContext:
+    # wspólne buforowanie dla kontekstów blokowych: update_into() przetwarza pełne bloki prosto z danych wejściowych
+    # do bufora podanego przez wołającego, a w self._buffer zostaje tylko niepełna końcówka (i ewentualnie wstrzymany blok)
+    hold_back = False # deszyfrowanie wstrzymuje ostatni pełny blok do finalize(), żeby zdjąć padding
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._finalized = False
+
+    def _process(self, source, out, out_offset, length):
+        raise NotImplementedError
+
+    def _ready(self, extra):
+        total = len(self._buffer) + extra
+        full = total - (total % 16)
+        if self.hold_back and full == total:
+            full -= 16
+        return max(full, 0)
+
+    def update_into(self, data, out, out_offset=0):
+        if self._finalized:
+            raise ValueError("Kontekst został już zakończony.")
+        buffer = self._buffer
+        full = self._ready(len(data))
+        if buffer:
+            buffer += data
+            if full:
+                self._process(buffer, out, out_offset, full)
+                del buffer[:full]
         else:
-            flat_output.append(item)
+            if full:
+                self._process(data, out, out_offset, full)
+            buffer += memoryview(data)[full:]
+        return full
+
+    def update(self, data):
+        out = bytearray(self._ready(len(data)))
+        self.update_into(data, out)
+        return out
+
+    def _close(self):
+        if self._finalized:
+            raise ValueError("Kontekst został już zakończony.")
+        self._finalized = True
+        return self._buffer
+
+class ECBEncryptor(_BlockContext):
+    # kontekst strumieniowy: update() szyfruje wszystkie pełne bloki, resztę trzyma do następnego wywołania,
+    # finalize() dodaje padding PKCS#7 -> cały plik to jeden szyfrogram z jednym kluczem
+    def __init__(self, schedule, encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+        super().__init__()
+        self._schedule = schedule
+        self._encrypt_blocks_into = encrypt_blocks_into
+
+    def _process(self, source, out, out_offset, length):
+        self._encrypt_blocks_into(source, self._schedule, out, out_offset, length)
+
+    def finalize(self):
+        last = pkcs7_pad(self._close())
+        out = bytearray(len(last))
+        self._process(last, out, 0, len(last))
+        return out
+
+class ECBDecryptor(_BlockContext):
+    hold_back = True
+
+    def __init__(self, schedule, decrypt_blocks_into=_tableAES.decrypt_blocks_into):
+        super().__init__()
+        self._schedule = schedule
+        self._decrypt_blocks_into = decrypt_blocks_into
+
+    def _process(self, source, out, out_offset, length):
+        self._decrypt_blocks_into(source, self._schedule, out, out_offset, length)
+
+    def finalize(self):
+        last = self._close()
+        if len(last) != 16:
+            raise ValueError("Niepoprawna długość szyfrogramu ECB.")
+        out = bytearray(16)
+        self._process(last, out, 0, 16)
+        return pkcs7_unpad(out)
+
+def decrypt_with_schedule(ciphertext, schedule):
+    decryptor = ECBDecryptor(schedule)
+    return bytes(decryptor.update(ciphertext) + decryptor.finalize())
 
-    return bytes(flat_output), key.hex()
+def AES_ECB_decrypt(ciphertext, key_length, key):
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    return decrypt_with_schedule(ciphertext, schedule)
 
-result, key = (AES_ECB_encrypt("Hello, World!", 128))
+#result, key = (AES_ECB_encrypt("Hello, World!", 128))
 #print("wynik:", result.hex())
 #print("klucz:", key)
 #print("\n")
@@ -1,7 +1,22 @@
-from . import _mainAES
-from . import _mainAES_192
-from . import _mainAES_256
+from . import _tableAES
+from . import _key_schedule
+from ._AES_ECB import _BlockContext
 import os
+import hmac
+import struct
+from functools import lru_cache
+
+_numpy = None # moduł numpy ładowany przy pierwszym dużym XOR, żeby import GCM nie płacił za numpy
+
+def _load_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
 
 def bytes_to_int(b):
     return int.from_bytes(b, 'big')
@@ -9,16 +24,16 @@ def bytes_to_int(b):
 def int_to_bytes(i, length=16):
     return i.to_bytes(length, 'big')
 
-def list_to_bytes(l):
-    return bytes(l)
-
-def list_to_int(l):
-    return bytes_to_int(list_to_bytes(l))
+NUMPY_XOR_MIN = 4096
 
 def xor_bytes(a, b):
-    return bytes(x ^ y for x, y in zip(a, b))
+    # XOR całych buforów naraz (numpy dla dużych kawałków albo jedna duża liczba), a nie bajt po bajcie w pętli interpretera
+    np = _load_numpy() if len(a) >= NUMPY_XOR_MIN else False
+    if np:
+        return (np.frombuffer(a, dtype=np.uint8) ^ np.frombuffer(b, dtype=np.uint8)).tobytes()
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
 
-def gf_mult(x, y):
+def gf_mult(x, y): # mnożenie bit po bicie -> zostaje jako wyrocznia do sprawdzania GHashTable
     R = 0xE1000000000000000000000000000000
     z = 0
     v = x
@@ -31,73 +46,71 @@ def gf_mult(x, y):
             v >>= 1
     return z
 
-def ghash(h, data):
-    y = 0
-    if len(data) % 16 != 0:
-        data += bytes(16 - (len(data) % 16))
-    for i in range(0, len(data), 16):
-        block = bytes_to_int(data[i:i+16])
-        y ^= block
-        y = gf_mult(y, h)
-    return y
-
-def AES_GCM_encrypt(plaintext, key_length, aad=b''):
-    if isinstance(plaintext, str):
-        plaintext_bytes = plaintext.encode('utf-8')
-    else:
-        plaintext_bytes = plaintext
+def gf_pow(h, exponent):
+    # H^exponent w GF(2^128) (podnoszenie do kwadratu i mnożenie) -> łączenie GHASH liczonych osobno dla segmentów:
+    # GHASH(A || B) = GHASH(A) * H^(bloki B) ^ GHASH(B)
+    result = 1 << 127 # jedynka w reprezentacji GCM (odwrócona kolejność bitów)
+    while exponent:
+        if exponent & 1:
+            result = gf_mult(result, h)
+        h = gf_mult(h, h)
+        exponent >>= 1
+    return result
 
-    if key_length == 128:
-        aes_module = _mainAES
-    elif key_length == 192:
-        aes_module = _mainAES_192
-    elif key_length == 256:
-        aes_module = _mainAES_256
-    else:
-        raise ValueError("Invalid key length")
+class GHashTable:
+    # Tablice Shoupa (8-bitowe) dla stałego H: 16 tablic po 256 wpisów, T[i][b] = (bajt b na pozycji i) * H.
+    # Mnożenie przez H to wtedy 16 lookupów zamiast 128 przesunięć z warunkiem.
+    __slots__ = ('h', 'tables')
 
-    key_bytes = os.urandom(key_length // 8)
-    key = bytes_to_int(key_bytes)
-    iv = os.urandom(12)
+    def __init__(self, h):
+        R = 0xE1000000000000000000000000000000
+        self.h = h
 
-    def encrypt_block_to_int(input_bytes, key_int):
-        raw_output = aes_module.main(input_bytes, key_int)
-        flat_list = []
-        is_matrix = isinstance(raw_output, list) and len(raw_output) == 4 and isinstance(raw_output[0], list)
-        
-        if is_matrix:
-            for row in raw_output:
-                flat_list.extend(row)
-        else:
-            flat_list = raw_output
+        powers = [] # powers[k] = H * x^k
+        v = h
+        for _ in range(128):
+            powers.append(v)
+            v = (v >> 1) ^ R if v & 1 else v >> 1
 
-        final_list = []
-        for x in flat_list:
-            if isinstance(x, str):
-                final_list.append(int(x, 16))
-            else:
-                final_list.append(x)
-        return list_to_int(final_list)
+        tables = []
+        for i in range(16):
+            basis = [powers[8 * i + 7 - j] for j in range(8)] # bit j bajtu i to współczynnik przy x^(8i + 7 - j)
+            t = [0] * 256
+            for b in range(1, 256):
+                low = b & -b
+                t[b] = t[b ^ low] ^ basis[low.bit_length() - 1]
+            tables.append(t)
+        self.tables = tuple(tables)
 
-    h_int = encrypt_block_to_int(bytes(16), key)
-    j0_int = bytes_to_int(iv + b'\x00\x00\x00\x01')
+    def mult(self, x):
+        xb = x.to_bytes(16, 'big')
+        z = 0
+        for t, b in zip(self.tables, xb):
+            z ^= t[b]
+        return z
 
-    ciphertext = bytearray()
-    counter = j0_int
-    num_blocks = (len(plaintext_bytes) + 15) // 16
+    def update(self, y, data):
+        # przetwarza pełne bloki 16 bajtów, y to dotychczasowy stan GHASH
+        t0, t1, t2, t3, t4, t5, t6, t7, t8, t9, t10, t11, t12, t13, t14, t15 = self.tables
+        from_bytes = int.from_bytes
+        mv = memoryview(data)
+        for i in range(0, len(mv), 16):
+            b = (y ^ from_bytes(mv[i:i + 16], 'big')).to_bytes(16, 'big')
+            y = (t0[b[0]] ^ t1[b[1]] ^ t2[b[2]] ^ t3[b[3]] ^ t4[b[4]] ^ t5[b[5]] ^ t6[b[6]] ^ t7[b[7]]
+                 ^ t8[b[8]] ^ t9[b[9]] ^ t10[b[10]] ^ t11[b[11]] ^ t12[b[12]] ^ t13[b[13]] ^ t14[b[14]] ^ t15[b[15]])
+        return y
 
-    for i in range(num_blocks):
-        high_96 = counter >> 32
-        low_32 = counter & 0xFFFFFFFF
-        low_32 = (low_32 + 1) & 0xFFFFFFFF
-        counter = (high_96 << 32) | low_32
+@lru_cache(maxsize=16)
+def ghash_table(h):
+    return GHashTable(h)
 
-        encrypted_counter = encrypt_block_to_int(int_to_bytes(counter), key)
-        chunk = plaintext_bytes[i*16 : (i+1) * 16]
-        enc_counter_bytes = int_to_bytes(encrypted_counter)
-        chunk_cipher = xor_bytes(chunk, enc_counter_bytes[:len(chunk)])
-        ciphertext.extend(chunk_cipher)
+def ghash(h, data): # h to int albo gotowa GHashTable
+    table = h if isinstance(h, GHashTable) else ghash_table(h)
+    if len(data) % 16 != 0:
+        data = bytes(data) + bytes(16 - (len(data) % 16))
+    return table.update(0, data)
 
+def gcm_tag(h_int, tag_mask, ciphertext, aad=b''):
     len_aad_bits = len(aad) * 8
     len_c_bits = len(ciphertext) * 8
 
@@ -111,12 +124,151 @@ def AES_GCM_encrypt(plaintext, key_length, aad=b''):
     ghash_input.extend(len_c_bits.to_bytes(8, 'big'))
 
     s_tag = ghash(h_int, ghash_input)
-    tag_mask = encrypt_block_to_int(int_to_bytes(j0_int), key)
-    tag = s_tag ^ tag_mask
+    return s_tag ^ tag_mask
+
+def AES_GCM_encrypt(plaintext, key_length, aad=b''):
+    if key_length not in (128, 192, 256):
+        raise ValueError("Invalid key length")
+
+    key_bytes = os.urandom(key_length // 8)
+    schedule = _key_schedule.get_key_schedule(key_bytes, key_length)
+    iv = os.urandom(12)
+
+    ciphertext, tag = encrypt_with_schedule(plaintext, schedule, iv, aad)
+    return ciphertext, tag, hex(schedule.key_int)[2:], iv
+
+def encrypt_with_schedule(plaintext, schedule, iv, aad=b''):
+    if isinstance(plaintext, str):
+        plaintext_bytes = plaintext.encode('utf-8')
+    else:
+        plaintext_bytes = plaintext
+
+    encryptor = GCMEncryptor(schedule, iv, aad)
+    ciphertext = bytes(encryptor.update(plaintext_bytes) + encryptor.finalize())
+    return ciphertext, encryptor.tag
+
+_COUNTER_BLOCK = struct.Struct('>12sI')
+
+def ctr_keystream_into(schedule, iv, counter, num_blocks, out, out_offset=0, encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+    # bloki licznika J0 + counter + 1 ... J0 + counter + num_blocks (licznik 32-bitowy, modulo 2^32) zapisywane są
+    # prosto do 'out' i tam szyfrowane w miejscu
+    pack_into = _COUNTER_BLOCK.pack_into
+    for i in range(num_blocks):
+        pack_into(out, out_offset + 16 * i, iv, (counter + i + 1) & 0xFFFFFFFF)
+    length = 16 * num_blocks
+    with memoryview(out) as view:
+        encrypt_blocks_into(view[out_offset:out_offset + length], schedule, out, out_offset, length)
+    return length
+
+def ctr_keystream(schedule, iv, counter, num_blocks, encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+    out = bytearray(16 * num_blocks)
+    ctr_keystream_into(schedule, iv, counter, num_blocks, out, 0, encrypt_blocks_into)
+    return out
+
+class _GCMContext(_BlockContext):
+    # licznik i stan GHASH przechodzą między wywołaniami update()
+    decrypt = False
+
+    def __init__(self, schedule, iv, aad=b'', encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+        if len(iv) != 12:
+            raise ValueError("IV dla GCM musi mieć 12 bajtów.")
+        super().__init__()
+        self._schedule = schedule
+        self._encrypt_blocks_into = encrypt_blocks_into
+        self._iv = bytes(iv)
+        first = bytearray(32) # E(0) -> H oraz E(J0) -> maska tagu
+        first[16:] = self._iv + b'\x00\x00\x00\x01'
+        encrypt_blocks_into(bytes(first), schedule, first)
+        self._ghash = ghash_table(bytes_to_int(first[:16]))
+        self._tag_mask = bytes_to_int(first[16:])
+        self._counter = 1 # J0 -> pierwszy blok danych używa J0 + 1
+        self._aad_len = len(aad)
+        self._text_len = 0
+        padded_aad = bytes(aad) + bytes(-len(aad) % 16)
+        self._y = self._ghash.update(0, padded_aad)
+
+    def _hash(self, view):
+        # pełne bloki idą do GHASH bez kopiowania, niepełna końcówka dopełniona zerami
+        full = len(view) - len(view) % 16
+        y = self._ghash.update(self._y, view[:full])
+        if full != len(view):
+            y = self._ghash.update(y, bytes(view[full:]) + bytes(16 - (len(view) - full)))
+        self._y = y
+
+    def _process(self, source, out, out_offset, length):
+        num_blocks = (length + 15) // 16
+        end = out_offset + length
+        with memoryview(source) as src, memoryview(out) as dst:
+            data = src[:length]
+            # GHASH zawsze liczony jest po szyfrogramie -> przy deszyfrowaniu po wejściu (zanim 'out' zostanie nadpisany),
+            # przy szyfrowaniu po wyjściu
+            if self.decrypt:
+                self._hash(data)
+            if length % 16:
+                # niepełny ostatni blok nie zmieści się w 'out' -> strumień klucza w osobnym buforze
+                keystream = memoryview(ctr_keystream(self._schedule, self._iv, self._counter, num_blocks, self._encrypt_blocks_into))[:length]
+            else:
+                ctr_keystream_into(self._schedule, self._iv, self._counter, num_blocks, out, out_offset, self._encrypt_blocks_into)
+                keystream = dst[out_offset:end]
+            self._counter = (self._counter + num_blocks) & 0xFFFFFFFF
+            dst[out_offset:end] = xor_bytes(data, keystream)
+            if not self.decrypt:
+                self._hash(dst[out_offset:end])
+        self._text_len += length
+
+    def _finish(self):
+        last = self._close()
+        output = bytearray(len(last))
+        if last:
+            self._process(last, output, 0, len(last))
+        lengths = (self._aad_len * 8).to_bytes(8, 'big') + (self._text_len * 8).to_bytes(8, 'big')
+        s_tag = self._ghash.update(self._y, lengths)
+        return output, int_to_bytes(s_tag ^ self._tag_mask)
+
+class GCMEncryptor(_GCMContext):
+    # tag jest dostępny po finalize()
+    def __init__(self, schedule, iv, aad=b'', encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+        super().__init__(schedule, iv, aad, encrypt_blocks_into)
+        self.tag = None
+
+    def finalize(self):
+        ciphertext, self.tag = self._finish()
+        return ciphertext
+
+class GCMDecryptor(_GCMContext):
+    # update() zwraca tekst jawny jeszcze przed weryfikacją -> dopiero finalize() potwierdza tag
+    decrypt = True
+
+    def __init__(self, schedule, iv, aad=b'', tag=None, encrypt_blocks_into=_tableAES.encrypt_blocks_into):
+        super().__init__(schedule, iv, aad, encrypt_blocks_into)
+        self.tag = tag
+
+    def finalize(self, tag=None):
+        expected = tag if tag is not None else self.tag
+        if expected is None:
+            raise ValueError("Deszyfrowanie GCM wymaga tagu.")
+        plaintext, computed = self._finish()
+        if not hmac.compare_digest(computed, bytes(expected)):
+            raise ValueError("Błąd weryfikacji tagu GCM.")
+        return plaintext
+
+def verify_tag(schedule, iv, ciphertext, tag, aad=b''):
+    # sprawdza tag bez deszyfrowania (np. zanim segmenty zostaną rozesłane do puli procesów)
+    h_int = bytes_to_int(_tableAES.encrypt_blocks(bytes(16), schedule))
+    tag_mask = bytes_to_int(_tableAES.encrypt_blocks(bytes(iv) + b'\x00\x00\x00\x01', schedule))
+    computed = int_to_bytes(gcm_tag(h_int, tag_mask, ciphertext, aad))
+    if tag is None or not hmac.compare_digest(computed, bytes(tag)):
+        raise ValueError("Błąd weryfikacji tagu GCM.")
+
+def decrypt_with_schedule(ciphertext, schedule, iv, tag, aad=b''):
+    decryptor = GCMDecryptor(schedule, iv, aad, tag)
+    return bytes(decryptor.update(ciphertext) + decryptor.finalize())
 
-    return bytes(ciphertext), int_to_bytes(tag), hex(key)[2:], iv
+def AES_GCM_decrypt(ciphertext, key_length, key, iv, tag, aad=b''):
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    return decrypt_with_schedule(ciphertext, schedule, iv, tag, aad)
 
-cipher_text, tag, key, iv = AES_GCM_encrypt("Hello, World!", 128)
+#cipher_text, tag, key, iv = AES_GCM_encrypt("Hello, World!", 128)
 #print(f"Plaintext(hex):  {"Hello, World!".encode('utf-8').hex()}")
 #print(f"Key (hex):        {key}")
 #print(f"IV (hex):         {iv.hex()}")
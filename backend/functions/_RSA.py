@@ -1,15 +1,9 @@
-import random
+import secrets
 import sys
 import time
 import hashlib
 import os
 
-# potrzebny większy limit konwersji string-> int
-try:
-    sys.set_int_max_str_digits(10000)
-except AttributeError:
-    pass
-
 # matematyka do RSA
 
 def gcd(a, b):
@@ -17,15 +11,37 @@ def gcd(a, b):
         a, b = b, a % b
     return a
 
-def is_prime_miller_rabin(n, k=40): # test czy liczba jest pierwsza (nie daje 100% pewności)
+def _small_primes(limit): # sito Eratostenesa, bez 2 (kandydaci i tak są nieparzyści)
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return [i for i in range(3, limit + 1) if sieve[i]]
+
+SMALL_PRIMES = _small_primes(10000)
+
+# minimalna liczba rund Millera-Rabina dla liczby pierwszej o danej długości (FIPS 186-5, tabela B.1;
+# dla 512 bitów, czyli kluczy 1024, wartość z FIPS 186-4, tabela C.2) -> (minimalna liczba bitów, rundy)
+MR_ROUNDS = ((1536, 4), (1024, 5), (512, 7))
+
+def mr_rounds(n_bits):
+    for min_bits, rounds in MR_ROUNDS:
+        if n_bits >= min_bits:
+            return rounds
+    return 40 # małe liczby (poza tabelą) -> zostaje dawna, zachowawcza wartość
+
+def is_prime_miller_rabin(n, k=None): # test czy liczba jest pierwsza (nie daje 100% pewności), k=None -> rundy wg FIPS 186-5
     if n == 2 or n == 3: return True
     if n % 2 == 0 or n < 2: return False
+    if k is None:
+        k = mr_rounds(n.bit_length())
     r, d = 0, n - 1
     while d % 2 == 0:
         r += 1
         d //= 2
     for _ in range(k):
-        a = random.randrange(2, n - 1)
+        a = secrets.randbelow(n - 3) + 2 # losowa podstawa z przedziału [2, n - 2]
         x = pow(a, d, n)
         if x == 1 or x == n - 1:
             continue
@@ -37,44 +53,155 @@ def is_prime_miller_rabin(n, k=40): # test czy liczba jest pierwsza (nie daje 10
             return False
     return True
 
-def get_prime(n_bits):
-    while True:
-        p = random.getrandbits(n_bits)
-        p |= (1 << n_bits - 1) | 1
+def sieve_window(candidate, width):
+    # okno kandydatów candidate + 2i (i < width): 1 -> nie dzieli się przez żadną małą liczbę pierwszą
+    window = bytearray([1]) * width
+    for prime in SMALL_PRIMES:
+        # candidate + 2i ≡ 0 (mod prime)  ->  i ≡ -candidate * 2^-1 (mod prime)
+        i = (-(candidate % prime) * ((prime + 1) // 2)) % prime
+        if candidate + 2 * i == prime: # sama mała liczba pierwsza nie jest złożona
+            i += prime
+        window[i::prime] = bytes(len(range(i, width, prime)))
+    return window
+
+def search_window(n_bits, e=65537, cancelled=None, top_bits=2):
+    # jedno okno: losowy nieparzysty start z 'top_bits' najwyższymi bitami ustawionymi (iloczyn liczb pierwszych ma wtedy
+    # dokładnie sumę ich długości bitów), sito na kolejnych liczbach nieparzystych i Miller-Rabin tylko dla tych,
+    # które przeszły sito; zwraca liczbę pierwszą albo None (brak w oknie / cancelled() zwróciło True)
+    width = max(2 * n_bits, 64)
+    candidate = secrets.randbits(n_bits) | (((1 << top_bits) - 1) << (n_bits - top_bits)) | 1
+    window = sieve_window(candidate, width)
+    for i in range(width):
+        if not window[i]:
+            continue
+        if cancelled is not None and cancelled():
+            return None
+        p = candidate + 2 * i
+        if p.bit_length() != n_bits:
+            return None
+        if (p - 1) % e == 0: # e musi być odwracalne modulo p - 1
+            continue
         if is_prime_miller_rabin(p):
             return p
+    return None
+
+def get_prime(n_bits, e=65537, top_bits=2):
+    while True:
+        p = search_window(n_bits, e, top_bits=top_bits)
+        if p is not None:
+            return p
+
+# RSA wielopierwszowe (RFC 8017): maksymalna liczba czynników dla danej długości modułu, tak jak w OpenSSL
+# (każdy czynnik musi zostać na tyle duży, żeby faktoryzacja metodą krzywych eliptycznych nie była łatwiejsza)
+MAX_PRIMES = ((4096, 4), (1024, 3))
+
+def max_primes(keysize):
+    for min_bits, count in MAX_PRIMES:
+        if keysize >= min_bits:
+            return count
+    return 2
+
+def prime_sizes(keysize, count=2):
+    # długości bitowe czynników, sumują się do keysize
+    if count < 2 or count > max_primes(keysize):
+        raise ValueError(f"Niepoprawna liczba czynników RSA ({count}) dla klucza {keysize} bitów.")
+    base, rest = divmod(keysize, count)
+    return [base + 1] * rest + [base] * (count - rest)
+
+def prime_top_bits(count):
+    # 2 ustawione bity -> iloczyn >= 0.75^2 * 2^suma >= 2^(suma - 1); dla 3-4 czynników potrzeba 3 bitów (0.875^4 > 0.5)
+    return 2 if count == 2 else 3
+
+class RSAPrivateKey:
+    # klucz prywatny z parametrami do CRT (RFC 8017, 3.2): zamiast jednego pow(c, d, n) potęgowania modulo
+    # kolejnych czynników o krótszych wykładnikach -> dla dwóch czynników około 3-4 razy szybciej, dla 3-4 jeszcze szybciej
+    # rozpakowanie 'd, n = klucz' działa jak dla dawnej krotki (d, n)
+    __slots__ = ('n', 'e', 'd', 'primes', 'p', 'q', 'dp', 'dq', 'qinv', 'extra')
+
+    def __init__(self, primes, e, d):
+        self.primes = tuple(primes)
+        p, q = self.primes[0], self.primes[1]
+        self.e = e
+        self.d = d
+        self.p = p
+        self.q = q
+        self.dp = d % (p - 1)
+        self.dq = d % (q - 1)
+        self.qinv = pow(q, -1, p)
+
+        # kolejne czynniki r_i: (r_i, d_i, t_i, R_i), gdzie R_i = r_1 * ... * r_(i-1), t_i = R_i^-1 mod r_i
+        extra = []
+        product = p * q
+        for r in self.primes[2:]:
+            extra.append((r, d % (r - 1), pow(product, -1, r), product))
+            product *= r
+        self.extra = tuple(extra)
+        self.n = product
+
+    def __iter__(self):
+        return iter((self.d, self.n))
+
+    def __repr__(self):
+        return f"RSAPrivateKey(bits={self.n.bit_length()}, primes={len(self.primes)})"
+
+    def decrypt_int(self, c):
+        return self.decrypt_ints((c,))[0]
+
+    def decrypt_ints(self, values):
+        # wiele bloków w jednym wywołaniu, parametry klucza związane raz jako zmienne lokalne
+        p, q, dp, dq, qinv, extra = self.p, self.q, self.dp, self.dq, self.qinv, self.extra
+        result = []
+        for c in values:
+            m2 = pow(c, dq, q)
+            m = m2 + (((pow(c, dp, p) - m2) * qinv) % p) * q
+            for r, d_r, t_r, product in extra: # algorytm Garnera dla kolejnych czynników
+                m += (((pow(c, d_r, r) - m) * t_r) % r) * product
+            result.append(m)
+        return result
+
+def keypair_from_primes(primes, e=65537, keysize=None):
+    # ((e, n), RSAPrivateKey) albo None, jeśli z tych czynników nie da się zbudować klucza
+    if len(set(primes)) != len(primes):
+        return None
+    n = 1
+    phi = 1
+    for r in primes:
+        n *= r
+        phi *= r - 1
+    if keysize is not None and n.bit_length() != keysize:
+        return None
+    if gcd(e, phi) != 1:
+        return None
+    private_key = RSAPrivateKey(primes, e, pow(e, -1, phi))
+    return ((e, n), private_key)
 
-def generate_keypair(keysize):
+def generate_keypair(keysize, primes=2):
     start = time.time()
     e = 65537 # standardowa wartość e
+    sizes = prime_sizes(keysize, primes)
+    top_bits = prime_top_bits(primes)
     while True:
-        p = get_prime(keysize // 2)
-        q = get_prime(keysize // 2)
-        if p == q: continue
-        n = p * q
-        phi = (p - 1) * (q - 1)
-        if gcd(e, phi) == 1:
-            try:
-                d = pow(e, -1, phi)
-                break
-            except ValueError:
-                continue
+        keypair = keypair_from_primes([get_prime(bits, e, top_bits) for bits in sizes], e, keysize)
+        if keypair is not None:
+            break
     #print(f"Gotowe w {time.time() - start:.2f}s.")
-    return ((e, n), (d, n))
+    return keypair
 
 def xor_bytes(a, b):
-    # Zwraca wynik XOR dwóch bajtów o tej samej długości
-    return bytes(x ^ y for x, y in zip(a, b))
+    # Zwraca wynik XOR dwóch ciągów bajtów o tej samej długości (jedna operacja na dużych liczbach zamiast pętli po bajtach)
+    return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
 
 def mgf1(seed, mask_len, hash_func=hashlib.sha256):
+    # maska w jednym przebiegu: stan hasha po ziarnie liczony raz, dla każdego licznika tylko kopia stanu,
+    # a bloki łączone jednym join zamiast doklejania 'mask +=' (kwadratowe kopiowanie)
     h_len = hash_func().digest_size
-    mask = b""
-    counter = 0
-    while len(mask) < mask_len:
-        C = counter.to_bytes(4, 'big')
-        mask += hash_func(seed + C).digest()
-        counter += 1
-    return mask[:mask_len]
+    base = hash_func(seed)
+    blocks = []
+    for counter in range((mask_len + h_len - 1) // h_len):
+        h = base.copy()
+        h.update(counter.to_bytes(4, 'big'))
+        blocks.append(h.digest())
+    return b"".join(blocks)[:mask_len]
 
 def oaep_pad(message, target_block_len, label=b"", hash_func=hashlib.sha256):
     h_len = hash_func().digest_size
@@ -128,60 +255,82 @@ def oaep_unpad(padded_block, target_block_len, label=b"", hash_func=hashlib.sha2
          
     return db[separator_idx + 1:]
 
+def oaep_capacity(key_bytes_len, h_len=32):
+    # maksymalna długość wiadomości w jednym bloku OAEP z SHA-256: k - 2 * hLen - 2 = k - 66
+    return key_bytes_len - 2 * h_len - 2
+
+def split_message(message_bytes, capacity):
+    # dokładne pakowanie: kolejne kawałki po 'capacity' bajtów (wycinki memoryview nie kopiują danych)
+    message_view = memoryview(message_bytes)
+    return [message_view[i:i+capacity] for i in range(0, len(message_view), capacity)]
+
+def encrypt_batch(chunks, public_key):
+    # lista kawałków (każdy <= oaep_capacity) -> lista bloków szyfrogramu po k bajtów
+    e, n = public_key
+    key_bytes_len = (n.bit_length() + 7) // 8
+
+    encrypted_blocks = []
+    for chunk in chunks:
+        padded_chunk = oaep_pad(chunk, key_bytes_len)
+        cipher_int = pow(int.from_bytes(padded_chunk, 'big'), e, n)
+        encrypted_blocks.append(cipher_int.to_bytes(key_bytes_len, 'big'))
+    return encrypted_blocks
+
 def encrypt(message_bytes, public_key):
     e, n = public_key
     key_bytes_len = (n.bit_length() + 7) // 8
-    
-    h_len = 32 
-    max_chunk_size = key_bytes_len - 2 * h_len - 2
+    max_chunk_size = oaep_capacity(key_bytes_len)
     
     if max_chunk_size <= 0:
         raise ValueError("Klucz RSA jest zbyt mały, by użyć OAEP z SHA-256.")
 
-    encrypted_blocks = []
-    
-    for i in range(0, len(message_bytes), max_chunk_size):
-        chunk = message_bytes[i:i+max_chunk_size]
-        
-        padded_chunk = oaep_pad(chunk, key_bytes_len)
-        
-        int_val = int.from_bytes(padded_chunk, 'big')
-        cipher_int = pow(int_val, e, n)
-        
-        cipher_bytes = cipher_int.to_bytes(key_bytes_len, 'big')
-        encrypted_blocks.append(cipher_bytes)
-        
-    return b"".join(encrypted_blocks)
+    return b"".join(encrypt_batch(split_message(message_bytes, max_chunk_size), public_key))
 
-def decrypt(ciphertext_bytes, private_key):
+def decrypt_batch(blocks, private_key):
+    # lista bloków szyfrogramu (po k bajtów) -> lista odszyfrowanych wiadomości;
+    # RSAPrivateKey liczy przez CRT, dawna krotka (d, n) pełnym potęgowaniem modulo n
     d, n = private_key
     key_bytes_len = (n.bit_length() + 7) // 8
-    
-    decrypted_stream = b""
-    
-    for i in range(0, len(ciphertext_bytes), key_bytes_len):
-        block = ciphertext_bytes[i:i+key_bytes_len]
-        
+
+    values = []
+    for block in blocks:
         if len(block) != key_bytes_len:
              raise ValueError("Uszkodzony szyfrogram (niepełny blok).")
+        values.append(int.from_bytes(block, 'big'))
 
-        int_val = int.from_bytes(block, 'big')
-        plain_int = pow(int_val, d, n)
-        padded_block = plain_int.to_bytes(key_bytes_len, 'big')
+    if isinstance(private_key, RSAPrivateKey):
+        plain_ints = private_key.decrypt_ints(values)
+    else:
+        plain_ints = [pow(c, d, n) for c in values]
 
+    chunks = []
+    for plain_int in plain_ints:
+        padded_block = plain_int.to_bytes(key_bytes_len, 'big')
         try:
-            chunk = oaep_unpad(padded_block, key_bytes_len)
-            decrypted_stream += chunk
+            chunks.append(oaep_unpad(padded_block, key_bytes_len))
         except ValueError:
             raise ValueError("Błąd weryfikacji OAEP - prawdopodobnie zły klucz prywatny.")
+    return chunks
+
+def decrypt(ciphertext_bytes, private_key):
+    d, n = private_key
+    key_bytes_len = (n.bit_length() + 7) // 8
 
-    return decrypted_stream
+    ciphertext_view = memoryview(ciphertext_bytes)
+    if len(ciphertext_view) % key_bytes_len != 0:
+        raise ValueError("Uszkodzony szyfrogram (niepełny blok).")
+    blocks = [ciphertext_view[i:i+key_bytes_len] for i in range(0, len(ciphertext_view), key_bytes_len)]
+    return b"".join(decrypt_batch(blocks, private_key))
 
-def main_input(inputText, keysize):
+def main_input(inputText, keysize, public_key=None):
+    # public_key -> gotowy klucz (np. z puli kluczy), bez niego nowa para kluczy przy każdym wywołaniu
     if isinstance(inputText, str):
         inputText = inputText.encode('utf-8')
     KEY_SIZE = keysize
-    pub, priv = generate_keypair(KEY_SIZE)
+    if public_key is not None:
+        pub = public_key
+    else:
+        pub, priv = generate_keypair(KEY_SIZE)
 
     long_text = inputText
     original_data = long_text
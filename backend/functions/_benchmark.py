@@ -0,0 +1,257 @@
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from . import _key_schedule
+from . import _mainAES
+from . import _tableAES
+from . import _AES_GCM
+from . import _RSA
+
+# Mikro-benchmark: szyfrowanie blok po bloku z nowym obiektem na każdy blok vs zapis prosto do bufora wyjściowego.
+# Uruchomienie: python -m functions._benchmark [liczba_bloków]
+# CPython nie udostępnia licznika pojedynczych alokacji, więc podaję szczytowe zużycie pamięci pośredniej
+# (tracemalloc, bez bufora wyjściowego przydzielonego wcześniej) w przeliczeniu na blok AES.
+# import_time() / check_import_budget() mierzą zimny import w świeżym interpreterze (tak startuje proces roboczy);
+# sprawdzane też w tests/test_startup.py.
+# run_xor() porównuje przepustowość XOR (bajty/s) na danych 1 MB: stara pętla po bajtach vs operacje na całych buforach.
+# run_keygen() mierzy generowanie pary kluczy RSA: dawne losowanie + 40 rund Millera-Rabina vs sito + rundy wg FIPS 186-5
+# (python -m functions._benchmark --keygen [rozmiary...], dawna wersja dla 4096 bitów trwa nawet kilka minut).
+# run_segmented() mierzy skalowanie AES-ECB jednego pliku podzielonego na segmenty (FileJob) z liczbą procesów (--segmented [MB]).
+# run_rsa_decrypt() porównuje deszyfrowanie RSA przez CRT (2-4 czynniki) z pełnym potęgowaniem modulo n (--rsa-decrypt [rozmiary...]).
+
+
+def _per_block(data, schedule):
+    # stary układ: wycinek bloku, osobny wynik dla każdego bloku, doklejanie do wyjścia
+    output = bytearray()
+    for i in range(0, len(data), 16):
+        output += _mainAES.main(data[i:i + 16], schedule)
+    return output
+
+
+def _table_per_block(data, schedule):
+    output = bytearray()
+    for i in range(0, len(data), 16):
+        output += _tableAES.encrypt_blocks(data[i:i + 16], schedule)
+    return output
+
+
+def _into(data, schedule, out):
+    _tableAES.encrypt_blocks_into(data, schedule, out)
+    return out
+
+
+def _measure(fn, *args, repeat=3):
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed, peak
+
+
+def run(num_blocks=4096):
+    schedule = _key_schedule.get_key_schedule(os.urandom(16))
+    data = os.urandom(16 * num_blocks)
+    out = bytearray(len(data))
+
+    results = {}
+    for name, fn, args in (
+        ('per-block (_mainAES)', _per_block, (data, schedule)),
+        ('per-block (T-tables)', _table_per_block, (data, schedule)),
+        ('encrypt_blocks_into', _into, (data, schedule, out)),
+    ):
+        elapsed, peak = _measure(fn, *args)
+        results[name] = {
+            'us_per_block': elapsed / num_blocks * 1e6,
+            'peak_bytes_per_block': peak / num_blocks,
+        }
+    return results
+
+
+def _xor_generator(a, b):
+    # poprzednia wersja xor_bytes z _AES_CBC / _AES_GCM / _RSA
+    return bytes(x ^ y for x, y in zip(a, b))
+
+
+def _blockwise(xor, data, mask):
+    # XOR po blokach 16 bajtów, tak jak w starym CBC/GCM (wycinki kopiowały każdy blok)
+    output = bytearray()
+    for i in range(0, len(data), 16):
+        output += xor(data[i:i + 16], mask[i:i + 16])
+    return output
+
+
+def run_xor(size=1024 * 1024, repeat=3):
+    data = os.urandom(size)
+    mask = os.urandom(size)
+    view = memoryview(data)
+
+    cases = [
+        ('generator, bloki 16 B (przed)', lambda: _blockwise(_xor_generator, data, mask)),
+        ('generator, cały bufor (przed)', lambda: _xor_generator(data, mask)),
+        ('int.from_bytes (_AES_CBC/_RSA)', lambda: _RSA.xor_bytes(view, mask)),
+        ('numpy (_AES_GCM)' if _AES_GCM._load_numpy() else 'int.from_bytes (_AES_GCM)', lambda: _AES_GCM.xor_bytes(view, mask)),
+    ]
+    results = {}
+    for name, fn in cases:
+        elapsed = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = min(elapsed, time.perf_counter() - start)
+        results[name] = size / elapsed
+    return results
+
+
+IMPORT_BUDGET = 0.1 # s, zimny import logic.workers w nowym procesie (tyle płaci każdy worker przy starcie "spawn")
+WORKER_MODULE = 'logic.workers'
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time(module=WORKER_MODULE, runs=5):
+    # najlepszy z kilku pomiarów, każdy w nowym procesie -> bez modułów z pamięci podręcznej interpretera
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    best = float('inf')
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], cwd=_BACKEND_DIR, capture_output=True, text=True, check=True)
+        best = min(best, float(result.stdout.strip().splitlines()[-1]))
+    return best
+
+
+def check_import_budget(module=WORKER_MODULE, budget=IMPORT_BUDGET, runs=5):
+    elapsed = import_time(module, runs)
+    if elapsed > budget:
+        raise RuntimeError(f"Import {module} trwa {elapsed * 1000:.1f} ms (limit {budget * 1000:.0f} ms).")
+    return elapsed
+
+
+def _legacy_get_prime(n_bits):
+    # poprzednia wersja _RSA.get_prime: każdy nieparzysty kandydat od razu do Millera-Rabina z k=40
+    while True:
+        p = random.getrandbits(n_bits)
+        p |= (1 << n_bits - 1) | 1
+        if _RSA.is_prime_miller_rabin(p, 40):
+            return p
+
+
+def _keypair_time(get_prime, key_size, e=65537):
+    start = time.perf_counter()
+    while True:
+        p = get_prime(key_size // 2)
+        q = get_prime(key_size // 2)
+        if p != q and _RSA.gcd(e, (p - 1) * (q - 1)) == 1:
+            return time.perf_counter() - start
+
+
+def _parallel_keypair_time(key_size, workers=None):
+    from . import _parallel_keygen
+    start = time.perf_counter()
+    _parallel_keygen.generate_keypair_parallel(key_size, workers)
+    return time.perf_counter() - start
+
+
+def run_keygen(sizes=(2048, 3072, 4096), runs=3, legacy=True, parallel=True, workers=None):
+    # średni czas wygenerowania pary kluczy (s) dla każdego rozmiaru
+    results = {}
+    for size in sizes:
+        row = {'sieve': sum(_keypair_time(_RSA.get_prime, size) for _ in range(runs)) / runs}
+        if parallel:
+            row['parallel'] = sum(_parallel_keypair_time(size, workers) for _ in range(runs)) / runs
+        if legacy:
+            row['legacy'] = sum(_keypair_time(_legacy_get_prime, size) for _ in range(runs)) / runs
+        results[size] = row
+    return results
+
+
+def run_rsa_decrypt(sizes=(2048, 3072, 4096), blocks=32, primes=(2, 3, 4)):
+    # bloki szyfrogramu na sekundę: RSAPrivateKey (CRT, 2-4 czynniki) vs dawna krotka (d, n)
+    # oraz czas generowania klucza dla każdej liczby czynników
+    results = {}
+    for size in sizes:
+        block_len = (size // 8) - 66
+        plaintext = os.urandom(block_len * blocks)
+        row = {}
+        for count in primes:
+            if count > _RSA.max_primes(size):
+                continue
+            start = time.perf_counter()
+            public_key, private_key = _RSA.generate_keypair(size, count)
+            row[f'keygen_{count}'] = time.perf_counter() - start
+            ciphertext = _RSA.encrypt(plaintext, public_key)
+            keys = [(f'crt_{count}', private_key)]
+            if count == 2:
+                keys.append(('plain', (private_key.d, private_key.n)))
+            for name, key in keys:
+                start = time.perf_counter()
+                _RSA.decrypt(ciphertext, key)
+                row[name] = blocks / (time.perf_counter() - start)
+        results[size] = row
+    return results
+
+
+def run_segmented(size_mb=16, workers=None, segment_size=None):
+    # MB/s dla 1, 2, 4, ... procesów (do os.cpu_count()), każda liczba procesów na własnej, rozgrzanej puli
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from . import _parallel
+
+    cpus = os.cpu_count() or 1
+    counts = workers or sorted({1, cpus} | {2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus})
+    key = os.urandom(16)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'in.bin')
+        target = os.path.join(tmp, 'out.bin')
+        with open(source, 'wb') as f:
+            f.write(os.urandom(size_mb * 1024 * 1024))
+        for count in counts:
+            with ProcessPoolExecutor(max_workers=count) as executor:
+                list(executor.map(abs, range(count))) # start procesów poza pomiarem
+                start = time.perf_counter()
+                _parallel.crypt_file_parallel('ECB', 'ENCRYPT', key, source, target, executor=executor,
+                                              segment_size=segment_size or _parallel.FILE_SEGMENT_SIZE)
+                results[count] = size_mb * 1024 * 1024 / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--segmented':
+        results = run_segmented(int(sys.argv[2]) if len(sys.argv) > 2 else 16)
+        for count, bytes_per_second in results.items():
+            print(f"{count:3} procesów: {bytes_per_second / 1e6:8.2f} MB/s   x{bytes_per_second / results[min(results)]:.2f}")
+        sys.exit()
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--rsa-decrypt':
+        sizes = tuple(int(a) for a in sys.argv[2:]) or (2048, 3072, 4096)
+        for size, row in run_rsa_decrypt(sizes).items():
+            print(f"RSA-{size}: pełne pow {row['plain']:8.1f} bloków/s")
+            for count in (2, 3, 4):
+                if f'crt_{count}' in row:
+                    print(f"    {count} czynniki: CRT {row[f'crt_{count}']:8.1f} bloków/s (x{row[f'crt_{count}'] / row['plain']:.1f})"
+                          f"   generowanie klucza {row[f'keygen_{count}']:6.2f} s")
+        sys.exit()
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--keygen':
+        sizes = tuple(int(a) for a in sys.argv[2:]) or (2048, 3072, 4096)
+        for size, row in run_keygen(sizes).items():
+            print(f"RSA-{size}: sito {row['sieve']:8.2f} s   równolegle ({os.cpu_count()} CPU) {row['parallel']:8.2f} s   "
+                  f"dawniej {row['legacy']:8.2f} s   x{row['legacy'] / row['sieve']:.1f}")
+        sys.exit()
+
+    num_blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    for name, r in run(num_blocks).items():
+        print(f"{name:24} {r['us_per_block']:8.2f} us/blok  {r['peak_bytes_per_block']:8.1f} B/blok (szczyt)")
+    print()
+    for name, bytes_per_second in run_xor().items():
+        print(f"{name:32} {bytes_per_second / 1e6:10.1f} MB/s")
+    print()
+    print(f"import {WORKER_MODULE}: {check_import_budget() * 1000:.1f} ms (limit {IMPORT_BUDGET * 1000:.0f} ms)")
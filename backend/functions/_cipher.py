@@ -0,0 +1,40 @@
+from . import _key_schedule
+from . import _registry
+from . import _AES_ECB
+from . import _AES_CBC
+from . import _AES_GCM
+
+# Odpowiednik Cipher(...).encryptor() z biblioteki cryptography dla naszych implementacji AES.
+# Kontekst tworzony jest raz na plik, a update() można wołać z kawałkami dowolnej długości.
+# Funkcje blokowe pochodzą z silnika w _registry (szyfr odwrotny istnieje tylko na tablicach T, a GCM deszyfruje
+# szyfrowaniem licznika; CBC jest sekwencyjny i zawsze idzie przez łańcuch na słowach z _tableAES).
+
+class Cipher:
+    def __init__(self, key, mode, iv=None, implementation='our', aad=b'', tag=None):
+        if mode not in ('ECB', 'CBC', 'GCM'):
+            raise ValueError("Nieznany tryb działania.")
+        if not _registry.has_engine('AES', mode, implementation):
+            raise ValueError(f"Nieznana implementacja: {implementation}")
+        self.key = bytes(key)
+        self.mode = mode
+        self.iv = iv
+        self.implementation = implementation
+        self.aad = aad
+        self.tag = tag
+        self.engine = _registry.get_engine('AES', mode, implementation)
+        self.schedule = _key_schedule.get_key_schedule(self.key)
+
+    def encryptor(self):
+        blocks = self.engine.load('blocks')
+        if self.mode == 'ECB':
+            return _AES_ECB.ECBEncryptor(self.schedule, blocks)
+        if self.mode == 'CBC':
+            return _AES_CBC.CBCEncryptor(self.schedule, self.iv)
+        return _AES_GCM.GCMEncryptor(self.schedule, self.iv, self.aad, blocks)
+
+    def decryptor(self):
+        if self.mode == 'ECB':
+            return _AES_ECB.ECBDecryptor(self.schedule, self.engine.load('blocks_decrypt'))
+        if self.mode == 'CBC':
+            return _AES_CBC.CBCDecryptor(self.schedule, self.iv)
+        return _AES_GCM.GCMDecryptor(self.schedule, self.iv, self.aad, self.tag, self.engine.load('blocks'))
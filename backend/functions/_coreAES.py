@@ -0,0 +1,125 @@
+from . import _galuaMath
+
+# Jeden rdzeń AES dla 128/192/256 bitów -> różnią się tylko Nk (słowa klucza) i Nr (liczba rund).
+# Stan to płaski bytearray 16 bajtów (kolumnami, tak jak dane wejściowe), wszystkie kroki rundy są wykonywane w miejscu.
+
+SBOX = bytes([
+0x63, 0x7c, 0x77, 0x7b, 0xf2, 0x6b, 0x6f, 0xc5, 0x30, 0x01, 0x67, 0x2b, 0xfe, 0xd7, 0xab, 0x76,
+0xca, 0x82, 0xc9, 0x7d, 0xfa, 0x59, 0x47, 0xf0, 0xad, 0xd4, 0xa2, 0xaf, 0x9c, 0xa4, 0x72, 0xc0,
+0xb7, 0xfd, 0x93, 0x26, 0x36, 0x3f, 0xf7, 0xcc, 0x34, 0xa5, 0xe5, 0xf1, 0x71, 0xd8, 0x31, 0x15,
+0x04, 0xc7, 0x23, 0xc3, 0x18, 0x96, 0x05, 0x9a, 0x07, 0x12, 0x80, 0xe2, 0xeb, 0x27, 0xb2, 0x75,
+0x09, 0x83, 0x2c, 0x1a, 0x1b, 0x6e, 0x5a, 0xa0, 0x52, 0x3b, 0xd6, 0xb3, 0x29, 0xe3, 0x2f, 0x84,
+0x53, 0xd1, 0x00, 0xed, 0x20, 0xfc, 0xb1, 0x5b, 0x6a, 0xcb, 0xbe, 0x39, 0x4a, 0x4c, 0x58, 0xcf,
+0xd0, 0xef, 0xaa, 0xfb, 0x43, 0x4d, 0x33, 0x85, 0x45, 0xf9, 0x02, 0x7f, 0x50, 0x3c, 0x9f, 0xa8,
+0x51, 0xa3, 0x40, 0x8f, 0x92, 0x9d, 0x38, 0xf5, 0xbc, 0xb6, 0xda, 0x21, 0x10, 0xff, 0xf3, 0xd2,
+0xcd, 0x0c, 0x13, 0xec, 0x5f, 0x97, 0x44, 0x17, 0xc4, 0xa7, 0x7e, 0x3d, 0x64, 0x5d, 0x19, 0x73,
+0x60, 0x81, 0x4f, 0xdc, 0x22, 0x2a, 0x90, 0x88, 0x46, 0xee, 0xb8, 0x14, 0xde, 0x5e, 0x0b, 0xdb,
+0xe0, 0x32, 0x3a, 0x0a, 0x49, 0x06, 0x24, 0x5c, 0xc2, 0xd3, 0xac, 0x62, 0x91, 0x95, 0xe4, 0x79,
+0xe7, 0xc8, 0x37, 0x6d, 0x8d, 0xd5, 0x4e, 0xa9, 0x6c, 0x56, 0xf4, 0xea, 0x65, 0x7a, 0xae, 0x08,
+0xba, 0x78, 0x25, 0x2e, 0x1c, 0xa6, 0xb4, 0xc6, 0xe8, 0xdd, 0x74, 0x1f, 0x4b, 0xbd, 0x8b, 0x8a,
+0x70, 0x3e, 0xb5, 0x66, 0x48, 0x03, 0xf6, 0x0e, 0x61, 0x35, 0x57, 0xb9, 0x86, 0xc1, 0x1d, 0x9e,
+0xe1, 0xf8, 0x98, 0x11, 0x69, 0xd9, 0x8e, 0x94, 0x9b, 0x1e, 0x87, 0xe9, 0xce, 0x55, 0x28, 0xdf,
+0x8c, 0xa1, 0x89, 0x0d, 0xbf, 0xe6, 0x42, 0x68, 0x41, 0x99, 0x2d, 0x0f, 0xb0, 0x54, 0xbb, 0x16
+])
+
+INV_SBOX = bytes(SBOX.index(i) for i in range(256))
+
+RCON = (0x01, 0x02, 0x04, 0x08, 0x10, 0x20, 0x40, 0x80, 0x1b, 0x36)
+
+# klucz w bajtach -> (Nk, Nr)
+PARAMS = {
+    16: (4, 10),
+    24: (6, 12),
+    32: (8, 14),
+}
+
+MUL2 = _galuaMath.MUL2
+MUL3 = _galuaMath.MUL3
+
+
+def SBoxMap(element):
+    return SBOX[element]
+
+
+def expand_key(key):
+    # zwraca płaski bytearray z 4 * (Nr + 1) słowami klucza rundowego
+    if len(key) not in PARAMS:
+        raise ValueError("Invalid key length")
+    nk, nr = PARAMS[len(key)]
+    total = 4 * (nr + 1)
+    w = bytearray(4 * total)
+    w[:len(key)] = key
+
+    for i in range(nk, total):
+        p = 4 * (i - 1)
+        t0, t1, t2, t3 = w[p], w[p + 1], w[p + 2], w[p + 3]
+        if i % nk == 0: # rotword + subword + rcon
+            t0, t1, t2, t3 = SBOX[t1] ^ RCON[i // nk - 1], SBOX[t2], SBOX[t3], SBOX[t0]
+        elif nk > 6 and i % nk == 4: # dodatkowy subword tylko dla AES-256
+            t0, t1, t2, t3 = SBOX[t0], SBOX[t1], SBOX[t2], SBOX[t3]
+        q = 4 * (i - nk)
+        o = 4 * i
+        w[o] = w[q] ^ t0
+        w[o + 1] = w[q + 1] ^ t1
+        w[o + 2] = w[q + 2] ^ t2
+        w[o + 3] = w[q + 3] ^ t3
+
+    return w
+
+
+def encrypt_state(s, round_keys, nr):
+    # szyfruje 16-bajtowy bytearray 's' w miejscu, bez tworzenia nowych list
+    sb, m2, m3 = SBOX, MUL2, MUL3
+
+    for i in range(16):
+        s[i] ^= round_keys[i]
+
+    for r in range(1, nr + 1):
+        # subbytes + shiftrows w jednym przejściu (wiersz 0 bez przesunięcia)
+        s[0] = sb[s[0]]
+        s[4] = sb[s[4]]
+        s[8] = sb[s[8]]
+        s[12] = sb[s[12]]
+        t = s[1]
+        s[1] = sb[s[5]]
+        s[5] = sb[s[9]]
+        s[9] = sb[s[13]]
+        s[13] = sb[t]
+        t = s[2]
+        s[2] = sb[s[10]]
+        s[10] = sb[t]
+        t = s[6]
+        s[6] = sb[s[14]]
+        s[14] = sb[t]
+        t = s[15]
+        s[15] = sb[s[11]]
+        s[11] = sb[s[7]]
+        s[7] = sb[s[3]]
+        s[3] = sb[t]
+
+        if r != nr: # w ostatniej rundzie nie wykonuję mixcol
+            for c in range(0, 16, 4):
+                a0, a1, a2, a3 = s[c], s[c + 1], s[c + 2], s[c + 3]
+                s[c] = m2[a0] ^ m3[a1] ^ a2 ^ a3
+                s[c + 1] = a0 ^ m2[a1] ^ m3[a2] ^ a3
+                s[c + 2] = a0 ^ a1 ^ m2[a2] ^ m3[a3]
+                s[c + 3] = m3[a0] ^ a1 ^ a2 ^ m2[a3]
+
+        k = 16 * r
+        for i in range(16):
+            s[i] ^= round_keys[k + i]
+
+    return s
+
+
+def encrypt_block(block, round_keys, nr):
+    state = bytearray(block)
+    encrypt_state(state, round_keys, nr)
+    return bytes(state)
+
+
+def main(inputText, key, key_bytes_len):
+    # wspólna implementacja dla _mainAES / _mainAES_192 / _mainAES_256
+    if isinstance(key, int): # surowy klucz -> rozszerzam go tutaj
+        return encrypt_block(inputText, expand_key(key.to_bytes(key_bytes_len, 'big')), PARAMS[key_bytes_len][1])
+    return encrypt_block(inputText, key.round_key_bytes, key.rounds)
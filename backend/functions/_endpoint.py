@@ -1,19 +1,101 @@
-from . import _AES_ECB
-from . import _AES_CBC
-from . import _AES_GCM
-from . import _RSA
-def what_to_run(input_data, key_length, mode):
-    if mode == 'AES_ECB':
-        return _AES_ECB.AES_ECB_encrypt(input_data, key_length)
-    elif mode == 'AES_CBC':
-        return _AES_CBC.AES_CBC_encrypt(input_data, key_length)
-    elif mode == 'AES_GCM':
-        return _AES_GCM.AES_GCM_encrypt(input_data, key_length)
-    elif mode == 'RSA_encrypt':
-        return _RSA.main_input(input_data, key_length)
+from . import _registry
+import os
+import sys
+def what_to_run(input_data, key_length, mode, implementation='our', key=None, iv=None, tag=None, workers=None, aes_mode='GCM', aes_key_length=256):
+    # mode: 'AES_ECB' / 'AES_CBC' / 'AES_GCM' (+ '_decrypt') albo 'RSA_encrypt' / 'RSA_HYBRID' -> silnik z rejestru, importowany przy pierwszym użyciu
+    # aes_mode / aes_key_length -> AES treści pliku w trybie hybrydowym
+    algorithm, name, operation = _registry.parse_mode(mode)
+    if not _registry.has_engine(algorithm, name, implementation):
+        implementation = 'our'
+    engine = _registry.get_engine(algorithm, name, implementation)
+    if operation == 'decrypt':
+        return what_to_run_decrypt(input_data, key_length, mode, key, iv, tag, workers, engine)
+    if engine.max_key_size is not None and key_length > engine.max_key_size:
+        raise ValueError("Invalid key length")
+    if algorithm == 'RSA' and key is None and workers is not None and workers > 1 and 'KEYGEN' in engine.parallelizable:
+        key, _ = engine.load('keygen_parallel')(key_length, workers) # para kluczy liczona na kilku procesach
+    if engine.mode == 'HYBRID':
+        if key is None:
+            key, _ = engine.load('keygen')(key_length)
+        return engine.load('encrypt')(input_data, key, aes_mode, aes_key_length) # nagłówek (opakowany klucz, IV, tag) + szyfrogram AES
+    if algorithm == 'RSA' and key is not None:
+        if workers is not None and workers > 1 and 'ENCRYPT' in engine.parallelizable:
+            return engine.load('encrypt_parallel')(input_data, key, workers=workers) # niezależne bloki OAEP w puli procesów
+        return engine.load('encrypt')(input_data, key_length, key) # key -> klucz publiczny (z puli albo wygenerowany wyżej)
+    return engine.load('encrypt')(input_data, key_length)
+
+def what_to_run_decrypt(input_data, key_length, mode, key, iv=None, tag=None, workers=None, engine=None):
+    # deszyfrowanie wymaga klucza (i IV / tagu) z wcześniejszego szyfrowania; workers > 1 -> segmenty AES w puli procesów
+    if key is None:
+        raise ValueError("Deszyfrowanie wymaga klucza.")
+    if engine is None:
+        algorithm, name, _ = _registry.parse_mode(mode)
+        engine = _registry.get_engine(algorithm, name)
+    if engine.algorithm == 'RSA':
+        return engine.load('decrypt')(input_data, key) # key -> klucz prywatny (RSAPrivateKey albo krotka (d, n)), w trybie hybrydowym też
+    if workers is not None and workers > 1 and 'DECRYPT' in engine.parallelizable:
+        from . import _key_schedule, _parallel
+        key_bytes = _key_schedule.get_key_schedule(key, key_length).key
+        return _parallel.decrypt_parallel(engine.mode, input_data, key_bytes, iv, tag, workers=workers)
+    decrypt = engine.load('decrypt')
+    if engine.mode == 'ECB':
+        return decrypt(input_data, key_length, key)
+    elif engine.mode == 'CBC':
+        return decrypt(input_data, key_length, key, iv)
+    elif engine.mode == 'GCM':
+        return decrypt(input_data, key_length, key, iv, tag)
     else:
         raise ValueError("Nieznany tryb działania.")
-    
+
+def new_cipher(key_length, mode, implementation='our'):
+    # losowy klucz i IV dla całego pliku; z obiektu Cipher można wziąć zarówno encryptor() jak i decryptor()
+    algorithm, name, _ = _registry.parse_mode(mode)
+    if algorithm != 'AES' or not _registry.has_engine(algorithm, name):
+        raise ValueError("Nieznany tryb działania.")
+    if key_length not in (128, 192, 256):
+        raise ValueError("Invalid key length")
+    key = os.urandom(key_length // 8)
+    if name == 'GCM':
+        iv = os.urandom(12)
+    elif name == 'CBC':
+        iv = os.urandom(16)
+    else:
+        iv = None
+    if not _registry.has_engine(algorithm, name, implementation):
+        implementation = 'our'
+    from . import _cipher
+    return _cipher.Cipher(key, name, iv, implementation)
+
+def shutdown_pools():
+    # pule procesów utworzone w tym procesie przez encrypt_parallel / decrypt_parallel (bez importu _parallel, gdy go nie było)
+    parallel = sys.modules.get(f"{__package__}._parallel")
+    if parallel is not None:
+        parallel.shutdown_executors()
+
+def new_keypair(key_length, keygen='sequential', workers=None, primes=2):
+    # para kluczy RSA: 'parallel' -> kandydaci na czynniki sprawdzani równolegle na kilku procesach,
+    # primes > 2 -> klucz wielopierwszowy (RFC 8017)
+    engine = _registry.get_engine('RSA', 'OAEP')
+    if engine.max_key_size is not None and key_length > engine.max_key_size:
+        raise ValueError("Invalid key length")
+    if keygen == 'parallel':
+        return engine.load('keygen_parallel')(key_length, workers, primes=primes)
+    return engine.load('keygen')(key_length, primes)
+
+def new_hybrid_encryptor(public_key, aes_mode='GCM', aes_key_length=256, implementation='our'):
+    # kontekst strumieniowy RSA-KEM + AES: najpierw zapisać .header, po finalize() tag od .tag_offset
+    engine = _registry.get_engine('RSA', 'HYBRID')
+    if not _registry.has_engine('AES', aes_mode, implementation):
+        implementation = 'our'
+    return engine.load('stream')(public_key, aes_mode, aes_key_length, implementation)
+
+def new_hybrid_decryptor(private_key, header, implementation='our'):
+    # header -> początek pliku (co najmniej cały nagłówek), długość nagłówka w .header_len
+    engine = _registry.get_engine('RSA', 'HYBRID')
+    if not _registry.has_engine('AES', 'GCM', implementation):
+        implementation = 'our'
+    return engine.load('stream_decrypt')(private_key, header, implementation)
+
 
 
 #przykład użycia:
@@ -26,7 +26,71 @@ def findReverseBruteForce(a : int) -> int: # jest to implementacja nieodporna na
             return i
 
 
+# Tablice liczone raz przy imporcie -> mnożenie w GF(2^8) to jeden lookup zamiast pętli po bitach.
+# multiply / findReverseBruteForce zostają jako implementacje referencyjne (patrz verify_tables).
 
+def xtime(a: int) -> int: # mnożenie przez x (czyli 0x02)
+    a <<= 1
+    if a & 0x100:
+        a ^= 0b100011011
+    return a
+
+
+def _build_log_tables():
+    exp = [0] * 512 # podwójna długość, żeby nie robić modulo 255 przy mnożeniu
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x ^= xtime(x) # mnożenie przez generator 0x03
+    for i in range(255, 512):
+        exp[i] = exp[i - 255]
+    return exp, log
+
+
+EXP, LOG = _build_log_tables()
+
+
+def gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return EXP[LOG[a] + LOG[b]]
+
+
+def _mul_table(b):
+    return bytes(gf_mul(a, b) for a in range(256))
+
+
+XTIME = MUL2 = _mul_table(0x02)
+MUL3 = _mul_table(0x03)
+MUL9 = _mul_table(0x09)
+MUL11 = _mul_table(0x0b)
+MUL13 = _mul_table(0x0d)
+MUL14 = _mul_table(0x0e)
+
+INV = bytes([0] + [EXP[255 - LOG[a]] for a in range(1, 256)]) # INV[0] = 0 tak jak w S-boxie
+
+
+def inverse(a: int) -> int:
+    return INV[a]
+
+
+def verify_tables() -> bool:
+    # porównuje tablice z implementacją referencyjną dla wszystkich 65 536 iloczynów
+    for a in range(256):
+        for b in range(256):
+            if gf_mul(a, b) != multiply(a, b):
+                raise AssertionError(f"gf_mul({a:#04x}, {b:#04x}) != multiply")
+    for b, table in ((0x02, MUL2), (0x03, MUL3), (0x09, MUL9), (0x0b, MUL11), (0x0d, MUL13), (0x0e, MUL14)):
+        for a in range(256):
+            if table[a] != multiply(a, b):
+                raise AssertionError(f"tablica mnożenia przez {b:#04x} niezgodna dla {a:#04x}")
+    for a in range(1, 256):
+        # findReverseBruteForce przeszukuje tylko 2 ** bit_length(a) kandydatów, więc sprawdzam definicję odwrotności
+        if multiply(a, INV[a]) != 1:
+            raise AssertionError(f"INV[{a:#04x}] nie jest elementem odwrotnym")
+    return True
         
 
 #print(bin(multiply(0b10010111, 0b00010011)))
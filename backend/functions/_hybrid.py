@@ -0,0 +1,118 @@
+import os
+import struct
+
+from . import _RSA
+from . import _cipher
+
+# Szyfrowanie hybrydowe (RSA-KEM + AES): losowy klucz AES opakowany raz przez RSA-OAEP, treść pliku szyfrowana naszym AES.
+# Plik zaczyna się od nagłówka opisującego sam siebie:
+#   'HYB1' | tryb AES (1 = CBC, 2 = GCM) | długość klucza AES | długość IV | długość tagu | długość opakowanego klucza (2 B)
+#   | opakowany klucz | IV | tag
+# Tag GCM znany jest dopiero po finalize(), więc przy szyfrowaniu strumieniowym nagłówek ma miejsce na tag wypełnione zerami
+# i tag dopisuje się później od tag_offset. Część nagłówka przed tagiem jest AAD dla GCM -> podmiana klucza albo IV psuje tag.
+
+MAGIC = b'HYB1'
+_HEADER = struct.Struct('>4sBBBBH')
+_MODES = {'CBC': 1, 'GCM': 2}
+_MODE_NAMES = {v: k for k, v in _MODES.items()}
+_IV_SIZES = {'CBC': 16, 'GCM': 12}
+_TAG_SIZES = {'CBC': 0, 'GCM': 16}
+
+
+def build_header(mode, key_len, wrapped_key, iv, tag=None):
+    tag_len = _TAG_SIZES[mode]
+    fixed = _HEADER.pack(MAGIC, _MODES[mode], key_len, len(iv), tag_len, len(wrapped_key))
+    return fixed + wrapped_key + iv + (tag or bytes(tag_len))
+
+
+def parse_header(data):
+    # nagłówek z początku pliku -> (tryb, opakowany klucz, IV, tag, długość nagłówka)
+    if len(data) < _HEADER.size:
+        raise ValueError("Uszkodzony nagłówek szyfrogramu hybrydowego.")
+    magic, mode_id, key_len, iv_len, tag_len, wrapped_len = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or mode_id not in _MODE_NAMES:
+        raise ValueError("Uszkodzony nagłówek szyfrogramu hybrydowego.")
+    header_len = _HEADER.size + wrapped_len + iv_len + tag_len
+    if len(data) < header_len:
+        raise ValueError("Uszkodzony nagłówek szyfrogramu hybrydowego.")
+    offset = _HEADER.size
+    wrapped_key = bytes(data[offset:offset + wrapped_len])
+    offset += wrapped_len
+    iv = bytes(data[offset:offset + iv_len])
+    offset += iv_len
+    tag = bytes(data[offset:offset + tag_len]) or None
+    return _MODE_NAMES[mode_id], wrapped_key, iv, tag, header_len
+
+
+def header_size(public_key, mode='GCM'):
+    e, n = public_key
+    return _HEADER.size + (n.bit_length() + 7) // 8 + _IV_SIZES[mode] + _TAG_SIZES[mode]
+
+
+class HybridEncryptor:
+    # update()/finalize() jak w kontekstach AES; nagłówek trzeba zapisać przed szyfrogramem
+    def __init__(self, public_key, mode='GCM', key_size=256, implementation='our'):
+        if mode not in _MODES:
+            raise ValueError("Tryb hybrydowy obsługuje tylko AES CBC i GCM.")
+        if key_size not in (128, 192, 256):
+            raise ValueError("Invalid key length")
+        key = os.urandom(key_size // 8)
+        iv = os.urandom(_IV_SIZES[mode])
+        self.mode = mode
+        self.wrapped_key = _RSA.encrypt(key, public_key) # jedna operacja RSA na cały plik
+        self.header = build_header(mode, key_size // 8, self.wrapped_key, iv)
+        self.tag_offset = len(self.header) - _TAG_SIZES[mode]
+        aad = self.header[:self.tag_offset] if mode == 'GCM' else b''
+        self._stream = _cipher.Cipher(key, mode, iv, implementation, aad).encryptor()
+        self.tag = None
+
+    def update(self, data):
+        return self._stream.update(data)
+
+    def update_into(self, data, out, out_offset=0):
+        return self._stream.update_into(data, out, out_offset)
+
+    def finalize(self):
+        result = self._stream.finalize()
+        self.tag = getattr(self._stream, 'tag', None)
+        return result
+
+    def final_header(self):
+        # nagłówek z wpisanym tagiem (po finalize)
+        return self.header[:self.tag_offset] + (self.tag or b'')
+
+
+class HybridDecryptor:
+    def __init__(self, private_key, header, implementation='our'):
+        mode, wrapped_key, iv, tag, header_len = parse_header(header)
+        key = _RSA.decrypt(wrapped_key, private_key)
+        if len(key) not in (16, 24, 32):
+            raise ValueError("Błąd odpakowania klucza AES.")
+        self.mode = mode
+        self.header_len = header_len
+        tag_offset = header_len - _TAG_SIZES[mode]
+        aad = bytes(header[:tag_offset]) if mode == 'GCM' else b''
+        self._stream = _cipher.Cipher(key, mode, iv, implementation, aad, tag).decryptor()
+
+    def update(self, data):
+        return self._stream.update(data)
+
+    def update_into(self, data, out, out_offset=0):
+        return self._stream.update_into(data, out, out_offset)
+
+    def finalize(self):
+        return self._stream.finalize()
+
+
+def hybrid_encrypt(plaintext, public_key, mode='GCM', key_size=256, implementation='our'):
+    if isinstance(plaintext, str):
+        plaintext = plaintext.encode('utf-8')
+    encryptor = HybridEncryptor(public_key, mode, key_size, implementation)
+    body = encryptor.update(plaintext) + encryptor.finalize()
+    return encryptor.final_header() + body
+
+
+def hybrid_decrypt(data, private_key, implementation='our'):
+    decryptor = HybridDecryptor(private_key, data, implementation)
+    body = memoryview(data)[decryptor.header_len:]
+    return decryptor.update(body) + decryptor.finalize()
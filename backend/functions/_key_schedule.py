@@ -0,0 +1,60 @@
+from functools import lru_cache
+
+from . import _coreAES
+from . import _tableAES
+
+# Rozszerzony klucz liczony raz na klucz i przekazywany do funkcji blokowych zamiast surowego key_int.
+
+KEY_SCHEDULE_CACHE_SIZE = 64
+
+class KeySchedule:
+    __slots__ = ('key', 'key_size', 'rounds', 'round_key_bytes', 'round_keys', 'decrypt_round_keys')
+
+    def __init__(self, key, key_size):
+        if len(key) not in _coreAES.PARAMS or len(key) * 8 != key_size:
+            raise ValueError("Invalid key length")
+        self.key = bytes(key)
+        self.key_size = key_size
+        self.rounds = _coreAES.PARAMS[len(key)][1]
+        self.round_key_bytes = bytes(_coreAES.expand_key(self.key)) # płaski klucz rundowy dla _coreAES
+        self.round_keys = _tableAES.words_from_round_key_bytes(self.round_key_bytes) # słowa 32-bitowe dla _tableAES
+        self.decrypt_round_keys = _tableAES.decryption_round_keys(self.round_keys) # klucze szyfru odwrotnego
+
+    @property
+    def key_int(self):
+        return int.from_bytes(self.key, 'big')
+
+    def __repr__(self):
+        return f"KeySchedule(AES-{self.key_size})"
+
+
+@lru_cache(maxsize=KEY_SCHEDULE_CACHE_SIZE)
+def _cached_schedule(key, key_size):
+    return KeySchedule(key, key_size)
+
+
+def get_key_schedule(key, key_size=None): # key to bytes, int albo hex (tak jak zwracają funkcje AES_*_encrypt)
+    if isinstance(key, str):
+        key = int(key, 16)
+    if isinstance(key, int):
+        if key_size is None:
+            raise ValueError("Dla klucza typu int trzeba podać key_size.")
+        key = key.to_bytes(key_size // 8, 'big')
+    key = bytes(key)
+    if key_size is None:
+        key_size = len(key) * 8
+    return _cached_schedule(key, key_size)
+
+
+def cache_stats():
+    info = _cached_schedule.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def clear_cache():
+    _cached_schedule.cache_clear()
@@ -1,69 +1,4 @@
-from . import _key_expansion
-from . import _galuaMath
+from . import _coreAES
 
-def main(inputText, key):
-    #expandedKey = _key_expansion.getExpandedKey(0x3f7a9c12b4e6d09f5a2c7e8b1d4f6032)
-    #expandedKey = _key_expansion.getExpandedKey(0x41623323375879394c70517221325a26)
-    expandedKey = _key_expansion.getExpandedKey(key)
-    inputBytes = inputText
-    #inputText = 0x69bc1c9fea029ebb23cb2164d75ef4be
-    #inputText = 0x6162636465666768696a6b6c6d6e6f70
-    #inputBytes = inputText.to_bytes(16, 'big')
-    textMatrix = [[0 for _ in range(4)] for _ in range(4)]
-    for i in range(4): # dzielę tekst na tablicę 4 x 4 z pojedynczymi bajtami
-      for j in range(4):
-        textMatrix[i][j] = inputBytes[i*4 + j]
-# w tym miejscu mam dwa główne argumenty -> "expandedKey" oraz "textMatrix" obie w postaci macierzy zawierających bajty danych
-
-    for i in range(4): # okej, tutaj wykonywany jest pierwsze "key addition" z wykorzystaniem pierwotnego klucza
-       for j in range(4):
-          textMatrix[i][j] = textMatrix[i][j] ^ expandedKey[i][j]
-
-    for r in range(10):
-        # sBox map
-        for i in range(4):
-            for j in range(4):
-                textMatrix[i][j] = _key_expansion.SBoxMap(textMatrix[i][j])
-        # shift row
-        
-        helperMatrix = [row.copy() for row in textMatrix]
-        textMatrix[0][0] = helperMatrix[0][0]
-        textMatrix[0][1] = helperMatrix[1][1]
-        textMatrix[0][2] = helperMatrix[2][2]
-        textMatrix[0][3] = helperMatrix[3][3]
-        textMatrix[1][0] = helperMatrix[1][0]
-        textMatrix[1][1] = helperMatrix[2][1]
-        textMatrix[1][2] = helperMatrix[3][2]
-        textMatrix[1][3] = helperMatrix[0][3]
-        textMatrix[2][0] = helperMatrix[2][0]
-        textMatrix[2][1] = helperMatrix[3][1]
-        textMatrix[2][2] = helperMatrix[0][2]
-        textMatrix[2][3] = helperMatrix[1][3]
-        textMatrix[3][0] = helperMatrix[3][0]
-        textMatrix[3][1] = helperMatrix[0][1]
-        textMatrix[3][2] = helperMatrix[1][2]
-        textMatrix[3][3] = helperMatrix[2][3]
-
-       # mixcol 
-       # problemem jest mnożenie macierzy -> jest niepoprawnie zaimplementowane -> niewłaściwie mnożone są macierze!!!!!!
-        if r != 9: # w ostatniej rundzie nie wykonuję mixcol
-            constantsMatrix = [[0x02, 0x01, 0x01, 0x03], [0x03, 0x02, 0x01, 0x01], [0x01, 0x03, 0x02, 0x01], [0x01, 0x01, 0x03, 0x02]]
-            helperMatrix2 = [[0 for _ in range(4)] for _ in range(4)]
-            for i in range(4):
-                for j in range(4):
-                    for k in range(4):
-                        if constantsMatrix[k][j] != 0:
-                            helperMatrix2[i][j] ^= _galuaMath.multiply(textMatrix[i][k], constantsMatrix[k][j])
-            textMatrix = helperMatrix2
-
-        # key add
-        for i in range(4): # okej, tutaj wykonywany jest "key addition" z wykorzystaniem kolejnych kluczy
-            for j in range(4):
-                textMatrix[i][j] = textMatrix[i][j] ^ expandedKey[4 * (r + 1) + i][j]
-
-    #for row in textMatrix:
-        #print([hex(b) for b in row])
-    return textMatrix
-
-#if __name__ == "__main__":
-#    main()
\ No newline at end of file
+def main(inputText, key): # key to int albo KeySchedule, zwraca zaszyfrowany blok jako bytes
+    return _coreAES.main(inputText, key, 16)
@@ -0,0 +1,143 @@
+import os
+
+from . import _coreAES
+from . import _key_schedule
+from . import _AES_CBC
+from . import _AES_GCM
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Wektorowa implementacja AES: N bloków trzymanych jako tablica (N, 16) uint8 i szyfrowanych jednocześnie.
+# Opłaca się dla trybów, w których bloki są niezależne (ECB, strumień licznika w GCM).
+# CBC jest sekwencyjny, więc idzie przez łańcuch na słowach z _AES_CBC.
+
+HAVE_NUMPY = np is not None
+
+if HAVE_NUMPY:
+    SBOX = np.frombuffer(_coreAES.SBOX, dtype=np.uint8)
+    SHIFT_ROWS = np.array([0, 5, 10, 15, 4, 9, 14, 3, 8, 13, 2, 7, 12, 1, 6, 11], dtype=np.intp)
+
+
+def _require_numpy():
+    if not HAVE_NUMPY:
+        raise RuntimeError("Implementacja 'our-numpy' wymaga zainstalowanego pakietu numpy.")
+
+
+def _xtime(a):
+    return (a << 1) ^ ((a >> 7) * np.uint8(0x1b))
+
+
+def _round_keys(schedule):
+    return np.frombuffer(schedule.round_key_bytes, dtype=np.uint8).reshape(schedule.rounds + 1, 16)
+
+
+def encrypt_state(state, schedule):
+    # state: tablica (N, 16) uint8, zwraca nową tablicę z szyfrogramem
+    round_keys = _round_keys(schedule)
+    nr = schedule.rounds
+    s = state ^ round_keys[0]
+
+    for r in range(1, nr + 1):
+        s = SBOX[s][:, SHIFT_ROWS] # subbytes przez fancy indexing + shiftrows jako stała permutacja
+
+        if r != nr:
+            cols = s.reshape(-1, 4, 4)
+            a0, a1, a2, a3 = cols[:, :, 0], cols[:, :, 1], cols[:, :, 2], cols[:, :, 3]
+            t = a0 ^ a1 ^ a2 ^ a3
+            mixed = np.empty_like(cols)
+            mixed[:, :, 0] = a0 ^ t ^ _xtime(a0 ^ a1)
+            mixed[:, :, 1] = a1 ^ t ^ _xtime(a1 ^ a2)
+            mixed[:, :, 2] = a2 ^ t ^ _xtime(a2 ^ a3)
+            mixed[:, :, 3] = a3 ^ t ^ _xtime(a3 ^ a0)
+            s = mixed.reshape(-1, 16)
+
+        s ^= round_keys[r]
+
+    return s
+
+
+def encrypt_blocks_into(buffer, schedule, out, out_offset=0, length=None):
+    # ten sam kontrakt co _tableAES.encrypt_blocks_into: wynik trafia do 'out' bez tworzenia obiektu bytes
+    _require_numpy()
+    if length is None:
+        length = len(buffer)
+    if length % 16 != 0:
+        raise ValueError("Długość danych musi być wielokrotnością 16 bajtów.")
+    if length:
+        state = np.frombuffer(buffer, dtype=np.uint8, count=length).reshape(-1, 16)
+        target = np.frombuffer(out, dtype=np.uint8, count=length, offset=out_offset)
+        target[:] = encrypt_state(state, schedule).reshape(-1)
+    return length
+
+
+def encrypt_blocks(buffer, schedule):
+    out = bytearray(len(buffer))
+    encrypt_blocks_into(buffer, schedule, out)
+    return bytes(out)
+
+
+def _pkcs7_pad(data):
+    pad_len = 16 - (len(data) % 16)
+    return bytes(data) + bytes([pad_len] * pad_len)
+
+
+def _to_bytes(plaintext):
+    if isinstance(plaintext, str):
+        return plaintext.encode('utf-8')
+    return plaintext
+
+
+def ecb_encrypt_with_schedule(plaintext, schedule):
+    return encrypt_blocks(_pkcs7_pad(_to_bytes(plaintext)), schedule)
+
+
+def cbc_encrypt_with_schedule(plaintext, schedule, iv):
+    return _AES_CBC.encrypt_with_schedule(plaintext, schedule, iv)
+
+
+def gcm_encrypt_with_schedule(plaintext, schedule, iv, aad=b''):
+    _require_numpy()
+    plaintext_bytes = _to_bytes(plaintext)
+    num_blocks = (len(plaintext_bytes) + 15) // 16
+
+    # wiersz 0 -> H = E(0), wiersz 1 -> J0 (maska tagu), dalej liczniki J0 + 1 ... J0 + n
+    counters = np.zeros((num_blocks + 2, 16), dtype=np.uint8)
+    counters[1:, :12] = np.frombuffer(iv, dtype=np.uint8)
+    low = (np.arange(1, num_blocks + 2, dtype=np.uint64) & 0xFFFFFFFF).astype('>u4')
+    counters[1:, 12:] = low.view(np.uint8).reshape(-1, 4)
+
+    encrypted = encrypt_state(counters, schedule)
+    h_int = int.from_bytes(encrypted[0].tobytes(), 'big')
+    tag_mask = int.from_bytes(encrypted[1].tobytes(), 'big')
+
+    keystream = encrypted[2:].reshape(-1)[:len(plaintext_bytes)]
+    ciphertext = (np.frombuffer(plaintext_bytes, dtype=np.uint8) ^ keystream).tobytes()
+
+    tag = _AES_GCM.gcm_tag(h_int, tag_mask, ciphertext, aad)
+    return ciphertext, tag.to_bytes(16, 'big')
+
+
+def AES_ECB_encrypt(plaintext, key_length):
+    _require_numpy()
+    key = os.urandom(key_length // 8)
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    return ecb_encrypt_with_schedule(plaintext, schedule), key.hex()
+
+
+def AES_CBC_encrypt(plaintext, key_length):
+    key = os.urandom(key_length // 8)
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    iv = os.urandom(16)
+    return cbc_encrypt_with_schedule(plaintext, schedule, iv), key.hex(), iv
+
+
+def AES_GCM_encrypt(plaintext, key_length, aad=b''):
+    _require_numpy()
+    key = os.urandom(key_length // 8)
+    schedule = _key_schedule.get_key_schedule(key, key_length)
+    iv = os.urandom(12)
+    ciphertext, tag = gcm_encrypt_with_schedule(plaintext, schedule, iv, aad)
+    return ciphertext, tag, key.hex(), iv
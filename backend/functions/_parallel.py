@@ -0,0 +1,296 @@
+import hmac
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import _key_schedule
+from . import _tableAES
+from . import _AES_ECB
+from . import _AES_CBC
+from . import _AES_GCM
+from . import _RSA
+from . import _registry
+
+# Deszyfrowanie wieloblokowe rozłożone na pulę procesów.
+# ECB i CTR (GCM) mają niezależne bloki, a w CBC blok tekstu jawnego zależy tylko od dwóch bloków szyfrogramu,
+# więc plik dzieli się na segmenty, które można liczyć równolegle i skleić w kolejności.
+# Tak samo szyfrowanie RSA-OAEP: każdy blok jest niezależny, więc segmenty po pełnych blokach idą do puli.
+# FileJob robi to samo dla całego pliku na dysku: proces z puli sam czyta swój segment i zapisuje wynik pod tym samym
+# przesunięciem w pliku wyjściowym (dane nie przechodzą przez proces główny), a GHASH segmentów łączy się przez H^bloki.
+
+SEGMENT_SIZE = 1024 * 1024
+FILE_SEGMENT_SIZE = 4 * 1024 * 1024
+RSA_BLOCKS_PER_TASK = 16
+
+_shared_executors = {}
+
+
+def shared_executor(workers=None):
+    # pula procesów tworzona raz na proces i liczbę workerów -> kolejne kawałki pliku nie płacą za start puli
+    workers = workers or os.cpu_count()
+    executor = _shared_executors.get(workers)
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        _shared_executors[workers] = executor
+    return executor
+
+
+def shutdown_executors():
+    # koniec workera: pule z shared_executor zamykane razem z nim (proces potomny kończy się os._exit, bez atexit puli)
+    while _shared_executors:
+        _, executor = _shared_executors.popitem()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _decrypt_segment(mode, key, data, previous_block, first_counter):
+    # wykonywane w procesie z puli -> dostaje surowy klucz, bo KeySchedule nie jest przesyłany między procesami
+    schedule = _key_schedule.get_key_schedule(key)
+    out = bytearray(len(data))
+    if mode == 'ECB':
+        _tableAES.decrypt_blocks_into(data, schedule, out)
+        return out
+    if mode == 'CBC':
+        _tableAES.decrypt_blocks_into(data, schedule, out, chain=previous_block)
+        return out
+    num_blocks = (len(data) + 15) // 16
+    keystream = _AES_GCM.ctr_keystream(schedule, previous_block, first_counter, num_blocks)
+    return _AES_GCM.xor_bytes(data, memoryview(keystream)[:len(data)])
+
+
+def _segments(mode, ciphertext, iv, segment_size):
+    segment_size -= segment_size % 16
+    for offset in range(0, len(ciphertext), segment_size):
+        data = ciphertext[offset:offset + segment_size]
+        if mode == 'CBC':
+            previous_block = iv if offset == 0 else ciphertext[offset - 16:offset]
+        elif mode == 'GCM':
+            previous_block = iv
+        else:
+            previous_block = None
+        yield data, previous_block, 1 + offset // 16
+
+
+def decrypt_parallel(mode, ciphertext, key, iv=None, tag=None, aad=b'', executor=None, workers=None, segment_size=SEGMENT_SIZE):
+    if mode not in ('ECB', 'CBC', 'GCM'):
+        raise ValueError("Nieznany tryb działania.")
+    if mode != 'GCM' and (len(ciphertext) == 0 or len(ciphertext) % 16 != 0):
+        raise ValueError(f"Niepoprawna długość szyfrogramu {mode}.")
+    key = bytes(key)
+    ciphertext = bytes(ciphertext)
+
+    if mode == 'GCM':
+        # tag sprawdzany przed oddaniem tekstu jawnego; GHASH jest sekwencyjny, więc liczy go proces główny
+        _AES_GCM.verify_tag(_key_schedule.get_key_schedule(key), iv, ciphertext, tag, aad)
+
+    if executor is None:
+        executor = shared_executor(workers)
+    futures = [executor.submit(_decrypt_segment, mode, key, data, previous_block, counter)
+               for data, previous_block, counter in _segments(mode, ciphertext, iv, segment_size)]
+    plaintext = b''.join(f.result() for f in futures)
+
+    if mode == 'ECB':
+        return _AES_ECB.pkcs7_unpad(plaintext)
+    if mode == 'CBC':
+        return _AES_CBC.pkcs7_unpad(plaintext)
+    return plaintext
+
+
+
+def encrypt_rsa_parallel(message, public_key, executor=None, workers=None, blocks_per_task=RSA_BLOCKS_PER_TASK):
+    # segmenty są wielokrotnością pojemności bloku OAEP, więc wynik jest taki sam jak z _RSA.encrypt (poza losowym ziarnem)
+    e, n = public_key
+    capacity = _RSA.oaep_capacity((n.bit_length() + 7) // 8)
+    if capacity <= 0:
+        raise ValueError("Klucz RSA jest zbyt mały, by użyć OAEP z SHA-256.")
+    segment_size = capacity * blocks_per_task
+    if len(message) <= segment_size:
+        return _RSA.encrypt(message, public_key)
+
+    if executor is None:
+        executor = shared_executor(workers)
+    message = bytes(message)
+    futures = [executor.submit(_RSA.encrypt, message[i:i + segment_size], public_key)
+               for i in range(0, len(message), segment_size)]
+    return b''.join(f.result() for f in futures)
+
+
+def _file_segment(mode, direction, implementation, key, iv, source_path, target_path, offset, length, out_offset):
+    # wykonywane w procesie z puli: odczyt segmentu, szyfrowanie / deszyfrowanie, zapis pod out_offset;
+    # zwraca (offset, długość, GHASH segmentu po szyfrogramie albo None, czas CPU tego procesu na segment)
+    cpu_start = time.process_time()
+    schedule = _key_schedule.get_key_schedule(key)
+    engine = _registry.get_engine('AES', mode, implementation)
+    with open(source_path, 'rb') as f:
+        previous_block = None
+        if mode == 'CBC':
+            if offset:
+                f.seek(offset - 16)
+                previous_block = f.read(16)
+            else:
+                previous_block = iv
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length:
+        raise ValueError("Plik zmienił się w trakcie przetwarzania.")
+
+    out = bytearray(length)
+    partial = None
+    if mode == 'GCM':
+        blocks = engine.load('blocks')
+        num_blocks = (length + 15) // 16
+        keystream = _AES_GCM.ctr_keystream(schedule, iv, 1 + offset // 16, num_blocks, blocks)
+        out[:] = _AES_GCM.xor_bytes(data, memoryview(keystream)[:length])
+        ciphertext = data if direction == 'DECRYPT' else out
+        table = _AES_GCM.ghash_table(_AES_GCM.bytes_to_int(_tableAES.encrypt_blocks(bytes(16), schedule)))
+        partial = table.update(0, bytes(ciphertext) + bytes(-length % 16))
+    elif direction == 'DECRYPT':
+        engine.load('blocks_decrypt')(data, schedule, out, chain=previous_block)
+    else:
+        engine.load('blocks')(data, schedule, out)
+
+    _write_at(target_path, out_offset, out)
+    return offset, length, partial, time.process_time() - cpu_start
+
+
+def _write_at(path, offset, data):
+    # os.pwrite pod zadanym przesunięciem -> procesy z puli piszą do jednego pliku bez wspólnego wskaźnika pozycji
+    fd = os.open(path, os.O_WRONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            if hasattr(os, 'pwrite'):
+                written += os.pwrite(fd, view[written:], offset + written)
+            else: # Windows
+                os.lseek(fd, offset + written, os.SEEK_SET)
+                written += os.write(fd, view[written:])
+    finally:
+        os.close(fd)
+
+
+class FileJob:
+    # podział pliku na segmenty dla puli procesów i złożenie wyniku:
+    # ECB (szyfrowanie i deszyfrowanie), CBC (deszyfrowanie), GCM (licznik od J0 + 1 + offset / 16, tag z GHASH segmentów).
+    # Plik wynikowy ma ten sam format co przy szyfrowaniu strumieniowym (PKCS#7 dla ECB/CBC, tag GCM na końcu pliku).
+    def __init__(self, mode, direction, key, source_path, target_path, iv=None, tag=None, aad=b'',
+                 implementation='our', segment_size=FILE_SEGMENT_SIZE):
+        if direction not in _registry.get_engine('AES', mode, implementation).parallelizable:
+            raise ValueError(f"Tryb {mode} nie obsługuje równoległego {direction}.")
+        self.mode = mode
+        self.direction = direction
+        self.key = bytes(key)
+        self.iv = iv
+        self.aad = bytes(aad)
+        self.implementation = implementation
+        self.source_path = source_path
+        self.target_path = target_path
+        self.segment_size = max(16, segment_size - segment_size % 16)
+        self.schedule = _key_schedule.get_key_schedule(self.key)
+
+        size = os.path.getsize(source_path)
+        self.tag = tag
+        if direction == 'DECRYPT' and mode == 'GCM' and tag is None:
+            # tag dopisany na końcu pliku przez szyfrowanie strumieniowe
+            if size < 16:
+                raise ValueError("Deszyfrowanie GCM wymaga tagu.")
+            with open(source_path, 'rb') as f:
+                f.seek(size - 16)
+                self.tag = f.read(16)
+            size -= 16
+        if direction == 'DECRYPT' and mode != 'GCM' and (size == 0 or size % 16):
+            raise ValueError(f"Niepoprawna długość szyfrogramu {mode}.")
+        self.input_size = size
+        # przy szyfrowaniu ECB niepełny ostatni blok (z paddingiem) liczy proces główny w finish()
+        self.body_size = size - size % 16 if (mode == 'ECB' and direction == 'ENCRYPT') else size
+        self.processed = 0
+        self.cpu_time = 0.0 # s CPU zużyte przez procesy z puli na segmenty
+        self._partials = {}
+
+    @property
+    def output_size(self):
+        if self.mode == 'GCM':
+            return self.input_size + (16 if self.direction == 'ENCRYPT' else 0)
+        if self.direction == 'ENCRYPT':
+            return self.body_size + 16
+        return self.input_size
+
+    def prepare(self):
+        # plik wyjściowy o docelowej długości -> segmenty mogą go zapisywać w dowolnej kolejności
+        with open(self.target_path, 'wb') as f:
+            if self.output_size:
+                try:
+                    os.posix_fallocate(f.fileno(), 0, self.output_size)
+                except (AttributeError, OSError): # brak posix_fallocate (Windows, macOS)
+                    f.truncate(self.output_size)
+
+    def tasks(self):
+        # argumenty dla _file_segment, po jednym zestawie na segment
+        for offset in range(0, self.body_size, self.segment_size):
+            length = min(self.segment_size, self.body_size - offset)
+            yield (self.mode, self.direction, self.implementation, self.key, self.iv,
+                   self.source_path, self.target_path, offset, length, offset)
+
+    def add_result(self, result):
+        offset, length, partial, cpu_time = result
+        self.processed += length
+        self.cpu_time += cpu_time
+        if partial is not None:
+            self._partials[offset] = (partial, (length + 15) // 16)
+
+    def _gcm_tag(self):
+        h = _AES_GCM.bytes_to_int(_tableAES.encrypt_blocks(bytes(16), self.schedule))
+        table = _AES_GCM.ghash_table(h)
+        y = table.update(0, self.aad + bytes(-len(self.aad) % 16))
+        for offset in sorted(self._partials):
+            partial, num_blocks = self._partials[offset]
+            y = _AES_GCM.gf_mult(y, _AES_GCM.gf_pow(h, num_blocks)) ^ partial
+        lengths = (len(self.aad) * 8).to_bytes(8, 'big') + (self.input_size * 8).to_bytes(8, 'big')
+        tag_mask = _AES_GCM.bytes_to_int(_tableAES.encrypt_blocks(bytes(self.iv) + b'\x00\x00\x00\x01', self.schedule))
+        return _AES_GCM.int_to_bytes(table.update(y, lengths) ^ tag_mask)
+
+    def finish(self):
+        # po wszystkich segmentach: końcówka ECB z paddingiem, zdjęcie paddingu po deszyfrowaniu, tag GCM;
+        # zwraca tag (GCM) albo None
+        if self.processed != self.body_size:
+            raise ValueError("Nie wszystkie segmenty zostały przetworzone.")
+        if self.mode == 'GCM':
+            tag = self._gcm_tag()
+            if self.direction == 'ENCRYPT':
+                _write_at(self.target_path, self.input_size, tag)
+                self.tag = tag
+                return tag
+            if self.tag is None or not hmac.compare_digest(tag, bytes(self.tag)):
+                with open(self.target_path, 'r+b') as f:
+                    f.truncate(0) # tekst jawny nie zostaje na dysku, jeśli tag się nie zgadza
+                raise ValueError("Błąd weryfikacji tagu GCM.")
+            return self.tag
+
+        if self.direction == 'ENCRYPT':
+            with open(self.source_path, 'rb') as f:
+                f.seek(self.body_size)
+                tail = _AES_ECB.pkcs7_pad(f.read())
+            out = bytearray(16)
+            _registry.get_engine('AES', self.mode, self.implementation).load('blocks')(tail, self.schedule, out)
+            _write_at(self.target_path, self.body_size, out)
+            return None
+
+        with open(self.target_path, 'r+b') as f:
+            f.seek(self.input_size - 16)
+            last = f.read(16)
+            f.truncate(self.input_size - 16 + len(_AES_ECB.pkcs7_unpad(last)))
+        return None
+
+
+def crypt_file_parallel(mode, direction, key, source_path, target_path, iv=None, tag=None, aad=b'',
+                        implementation='our', executor=None, workers=None, segment_size=FILE_SEGMENT_SIZE, progress=None):
+    # cały plik przez pulę procesów; progress(przetworzone_bajty, wszystkie_bajty) po każdym segmencie
+    job = FileJob(mode, direction, key, source_path, target_path, iv, tag, aad, implementation, segment_size)
+    job.prepare()
+    if executor is None:
+        executor = shared_executor(workers)
+    futures = [executor.submit(_file_segment, *args) for args in job.tasks()]
+    for future in as_completed(futures):
+        job.add_result(future.result())
+        if progress is not None:
+            progress(job.processed, job.body_size)
+    return job.finish()
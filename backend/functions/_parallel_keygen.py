@@ -0,0 +1,90 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from . import _RSA
+
+# Równoległe generowanie pary kluczy RSA.
+# Szukanie liczby pierwszej to ciąg niezależnych okien kandydatów, więc każdy proces z puli szuka na własnym
+# losowym starcie, a pierwsze znalezione liczby (p i q albo wszystkie czynniki klucza wielopierwszowego) wygrywają.
+# Pozostałe procesy widzą ustawione zdarzenie anulowania między kolejnymi testami Millera-Rabina i kończą pracę bez wyniku.
+
+_cancel_event = None
+PARENT_CHECK_INTERVAL = 0.5 # s
+
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+    threading.Thread(target=_watch_parent, args=(os.getppid(),), daemon=True).start()
+
+
+def _watch_parent(parent_pid):
+    # worker RSA zabity przez terminate() nie ustawi cancel_event -> proces z puli kończy się sam, gdy zniknie rodzic
+    while os.getppid() == parent_pid:
+        _cancel_event.wait(PARENT_CHECK_INTERVAL)
+        if _cancel_event.is_set():
+            return
+    os._exit(0)
+
+
+def _find_prime(n_bits, e, top_bits):
+    # wykonywane w procesie z puli: okno po oknie aż do znalezienia liczby pierwszej albo anulowania
+    cancelled = _cancel_event.is_set
+    while not cancelled():
+        p = _RSA.search_window(n_bits, e, cancelled, top_bits)
+        if p is not None:
+            return p
+    return None
+
+
+def generate_keypair_parallel(keysize, workers=None, e=65537, primes=2):
+    workers = workers or os.cpu_count() or 1
+    if workers < 2:
+        return _RSA.generate_keypair(keysize, primes)
+
+    sizes = _RSA.prime_sizes(keysize, primes)
+    top_bits = _RSA.prime_top_bits(primes)
+    found = [None] * len(sizes)
+    task_sizes = {}
+
+    cancel_event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cancel_event,))
+
+    def submit(pending):
+        # zadania rozdzielane po kolei między czynniki, których jeszcze brakuje
+        open_slots = [i for i, p in enumerate(found) if p is None] or list(range(len(sizes)))
+        bits = sizes[open_slots[len(pending) % len(open_slots)]]
+        future = executor.submit(_find_prime, bits, e, top_bits)
+        task_sizes[future] = bits
+        pending.add(future)
+
+    try:
+        pending = set()
+        while len(pending) < workers:
+            submit(pending)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                p = future.result()
+                bits = task_sizes.pop(future)
+                if p is None or p in found:
+                    continue
+                for i, size in enumerate(sizes):
+                    if found[i] is None and size == bits:
+                        found[i] = p
+                        break
+
+            if None not in found:
+                keypair = _RSA.keypair_from_primes(found, e, keysize)
+                if keypair is not None:
+                    return keypair
+                found[-1] = None # zestaw odrzucony (gcd(e, phi) != 1) -> ostatni czynnik szukany od nowa
+
+            # każde zakończone zadanie zastępuje nowe, żeby wszystkie procesy cały czas szukały
+            while len(pending) < workers:
+                submit(pending)
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
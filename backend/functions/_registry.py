@@ -0,0 +1,122 @@
+from importlib import import_module
+
+# Rejestr silników szyfrujących: klucz (algorytm, tryb, implementacja) -> opis silnika.
+# Moduły z implementacjami importowane są dopiero przy pierwszym użyciu, więc nowy proces roboczy
+# nie płaci za import numpy / RSA / pozostałych trybów, których nie uruchamia.
+# Funkcje podawane są jako 'moduł:atrybut' (moduł względem pakietu functions).
+
+_PACKAGE = __name__.rpartition('.')[0]
+
+
+class Engine:
+    __slots__ = ('algorithm', 'mode', 'implementation', 'refs', 'streaming', 'parallelizable', 'max_key_size', '_loaded')
+
+    def __init__(self, algorithm, mode, implementation, refs, streaming=False, parallelizable=(), max_key_size=None):
+        self.algorithm = algorithm
+        self.mode = mode
+        self.implementation = implementation
+        self.refs = refs # 'encrypt', 'encrypt_parallel', 'decrypt', 'blocks', 'blocks_decrypt', 'stream', 'stream_decrypt', 'keygen', 'keygen_parallel' -> 'moduł:atrybut'
+        self.streaming = streaming # kontekst update()/finalize() przez _cipher.Cipher
+        self.parallelizable = frozenset(parallelizable) # operacje ('ENCRYPT' / 'DECRYPT' / 'KEYGEN'), które można rozłożyć na procesy
+        self.max_key_size = max_key_size
+        self._loaded = {}
+
+    @property
+    def decrypt(self):
+        return 'decrypt' in self.refs
+
+    def supports(self, name):
+        return name in self.refs
+
+    def load(self, name):
+        # import modułu przy pierwszym odwołaniu, potem funkcja trzymana w słowniku
+        func = self._loaded.get(name)
+        if func is None:
+            if name not in self.refs:
+                raise ValueError(f"Silnik {self.algorithm}/{self.mode}/{self.implementation} nie obsługuje operacji '{name}'.")
+            module_name, _, attr = self.refs[name].partition(':')
+            func = getattr(import_module(f"{_PACKAGE}.{module_name}"), attr)
+            self._loaded[name] = func
+        return func
+
+    def capabilities(self):
+        return {
+            'streaming': self.streaming,
+            'parallelizable': sorted(self.parallelizable),
+            'decrypt': self.decrypt,
+            'max_key_size': self.max_key_size,
+        }
+
+    def __repr__(self):
+        return f"Engine({self.algorithm!r}, {self.mode!r}, {self.implementation!r})"
+
+
+_ENGINES = {}
+
+
+def register(engine):
+    _ENGINES[(engine.algorithm, engine.mode, engine.implementation)] = engine
+    return engine
+
+
+def get_engine(algorithm, mode, implementation='our'):
+    engine = _ENGINES.get((algorithm, mode, implementation))
+    if engine is None:
+        raise ValueError(f"Nieznany silnik: {algorithm}/{mode}/{implementation}")
+    return engine
+
+
+def has_engine(algorithm, mode, implementation='our'):
+    return (algorithm, mode, implementation) in _ENGINES
+
+
+def engines(algorithm=None):
+    return [e for e in _ENGINES.values() if algorithm is None or e.algorithm == algorithm]
+
+
+def parse_mode(mode):
+    # nazwy trybów używane przez workerów i websocket: 'AES_ECB', 'AES_GCM_decrypt', 'RSA_encrypt', 'RSA_HYBRID'
+    # -> (algorytm, tryb, operacja)
+    algorithm, _, rest = mode.partition('_')
+    if algorithm == 'RSA':
+        # 'RSA_encrypt' / 'RSA_decrypt' -> czyste RSA-OAEP, 'RSA_HYBRID' / 'RSA_HYBRID_decrypt' -> RSA-KEM + AES
+        name, _, operation = rest.partition('_') if rest.startswith('HYBRID') else ('OAEP', '', rest)
+        return 'RSA', name, operation if operation in ('encrypt', 'decrypt') else 'encrypt'
+    name, _, operation = rest.partition('_')
+    return algorithm, name, operation or 'encrypt'
+
+
+# AES: tablice T (our) i wektorowo (our-numpy); szyfr odwrotny jest tylko na tablicach T
+_AES_DECRYPT = {'ECB': '_AES_ECB:AES_ECB_decrypt', 'CBC': '_AES_CBC:AES_CBC_decrypt', 'GCM': '_AES_GCM:AES_GCM_decrypt'}
+_AES_PARALLEL = {'ECB': ('ENCRYPT', 'DECRYPT'), 'CBC': ('DECRYPT',), 'GCM': ('ENCRYPT', 'DECRYPT')}
+
+for _mode in ('ECB', 'CBC', 'GCM'):
+    register(Engine('AES', _mode, 'our', {
+        'encrypt': f'_AES_{_mode}:AES_{_mode}_encrypt',
+        'decrypt': _AES_DECRYPT[_mode],
+        'blocks': '_tableAES:encrypt_blocks_into',
+        'blocks_decrypt': '_tableAES:decrypt_blocks_into',
+    }, streaming=True, parallelizable=_AES_PARALLEL[_mode], max_key_size=256))
+    register(Engine('AES', _mode, 'our-numpy', {
+        'encrypt': f'_numpyAES:AES_{_mode}_encrypt',
+        'decrypt': _AES_DECRYPT[_mode],
+        'blocks': '_numpyAES:encrypt_blocks_into',
+        'blocks_decrypt': '_tableAES:decrypt_blocks_into',
+    }, streaming=True, parallelizable=_AES_PARALLEL[_mode], max_key_size=256))
+
+register(Engine('RSA', 'OAEP', 'our', {
+    'encrypt': '_RSA:main_input',
+    'encrypt_parallel': '_parallel:encrypt_rsa_parallel',
+    'decrypt': '_RSA:decrypt',
+    'keygen': '_RSA:generate_keypair',
+    'keygen_parallel': '_parallel_keygen:generate_keypair_parallel',
+}, streaming=False, parallelizable=('ENCRYPT', 'KEYGEN'), max_key_size=4096))
+
+# hybrydowo: klucz AES opakowany raz przez RSA-OAEP, treść pliku szyfrowana AES (CBC / GCM) strumieniowo
+register(Engine('RSA', 'HYBRID', 'our', {
+    'encrypt': '_hybrid:hybrid_encrypt',
+    'decrypt': '_hybrid:hybrid_decrypt',
+    'stream': '_hybrid:HybridEncryptor',
+    'stream_decrypt': '_hybrid:HybridDecryptor',
+    'keygen': '_RSA:generate_keypair',
+}, streaming=True, parallelizable=(), max_key_size=4096))
@@ -0,0 +1,183 @@
+import struct
+
+from . import _coreAES
+from . import _galuaMath
+
+# Implementacja AES na słowach 32-bitowych z tablicami T (SubBytes + ShiftRows + MixColumns w jednym lookupie).
+# Tablice liczone są raz przy imporcie modułu, a nie przy każdym bloku.
+
+SBOX = _coreAES.SBOX
+INV_SBOX = _coreAES.INV_SBOX
+
+
+def _ror8(word):
+    return ((word >> 8) | (word << 24)) & 0xFFFFFFFF
+
+
+def _build_tables():
+    te0 = []
+    for x in range(256):
+        s = SBOX[x]
+        te0.append((_coreAES.MUL2[s] << 24) | (s << 16) | (s << 8) | _coreAES.MUL3[s])
+    te1 = [_ror8(w) for w in te0]
+    te2 = [_ror8(w) for w in te1]
+    te3 = [_ror8(w) for w in te2]
+    return te0, te1, te2, te3
+
+
+TE0, TE1, TE2, TE3 = _build_tables()
+
+
+def _build_inverse_tables():
+    # InvSubBytes + InvShiftRows + InvMixColumns -> szyfr odwrotny w tej samej postaci co szyfrowanie
+    td0 = []
+    for x in range(256):
+        s = INV_SBOX[x]
+        td0.append((_galuaMath.MUL14[s] << 24) | (_galuaMath.MUL9[s] << 16) | (_galuaMath.MUL13[s] << 8) | _galuaMath.MUL11[s])
+    td1 = [_ror8(w) for w in td0]
+    td2 = [_ror8(w) for w in td1]
+    td3 = [_ror8(w) for w in td2]
+    return td0, td1, td2, td3
+
+
+TD0, TD1, TD2, TD3 = _build_inverse_tables()
+
+# S-box przesunięty na pozycję bajtu w słowie -> ostatnia runda bez MixColumns
+S0 = [s << 24 for s in SBOX]
+S1 = [s << 16 for s in SBOX]
+S2 = [s << 8 for s in SBOX]
+S3 = list(SBOX)
+
+IS0 = [s << 24 for s in INV_SBOX]
+IS1 = [s << 16 for s in INV_SBOX]
+IS2 = [s << 8 for s in INV_SBOX]
+IS3 = list(INV_SBOX)
+
+_BLOCK = struct.Struct('>4I')
+
+
+def words_from_round_key_bytes(round_key_bytes):
+    # płaski klucz rundowy z _coreAES -> słowa 32-bitowe
+    return list(struct.unpack(f'>{len(round_key_bytes) // 4}I', round_key_bytes))
+
+
+def expand_key(key):
+    # klucz w bajtach -> lista 4 * (Nr + 1) słów rundowych
+    return words_from_round_key_bytes(_coreAES.expand_key(key))
+
+
+def decryption_round_keys(round_keys):
+    # klucze dla równoważnego szyfru odwrotnego: odwrócona kolejność rund, InvMixColumns na kluczach środkowych rund
+    rounds = len(round_keys) // 4 - 1
+    td0, td1, td2, td3, sbox = TD0, TD1, TD2, TD3, SBOX
+    dk = list(round_keys[4 * rounds:4 * rounds + 4])
+    for r in range(rounds - 1, 0, -1):
+        for w in round_keys[4 * r:4 * r + 4]:
+            dk.append(td0[sbox[w >> 24]] ^ td1[sbox[(w >> 16) & 0xFF]] ^ td2[sbox[(w >> 8) & 0xFF]] ^ td3[sbox[w & 0xFF]])
+    dk.extend(round_keys[0:4])
+    return dk
+
+
+def encrypt_blocks_into(buffer, round_keys, out, out_offset=0, length=None, chain=None):
+    # szyfruje pierwsze 'length' bajtów z 'buffer' i zapisuje wynik do 'out' od 'out_offset' (może to być ten sam bufor);
+    # chain = poprzedni blok szyfrogramu (IV) -> tryb CBC liczony na słowach, bez tworzenia bloków pośrednich
+    if length is None:
+        length = len(buffer)
+    if length % 16 != 0:
+        raise ValueError("Długość danych musi być wielokrotnością 16 bajtów.")
+    round_keys = getattr(round_keys, 'round_keys', round_keys)
+
+    rounds = len(round_keys) // 4 - 1
+    te0, te1, te2, te3 = TE0, TE1, TE2, TE3
+    s0_, s1_, s2_, s3_ = S0, S1, S2, S3
+    unpack_from = _BLOCK.unpack_from
+    pack_into = _BLOCK.pack_into
+    k0, k1, k2, k3 = round_keys[0:4]
+    middle = [tuple(round_keys[4 * r:4 * r + 4]) for r in range(1, rounds)]
+    f0, f1, f2, f3 = round_keys[4 * rounds:4 * rounds + 4]
+
+    chained = chain is not None
+    p0, p1, p2, p3 = unpack_from(chain, 0) if chained else (0, 0, 0, 0)
+
+    for offset in range(0, length, 16):
+        s0, s1, s2, s3 = unpack_from(buffer, offset)
+        s0 ^= k0 ^ p0
+        s1 ^= k1 ^ p1
+        s2 ^= k2 ^ p2
+        s3 ^= k3 ^ p3
+
+        for r0, r1, r2, r3 in middle:
+            t0 = te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xFF] ^ te2[(s2 >> 8) & 0xFF] ^ te3[s3 & 0xFF] ^ r0
+            t1 = te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xFF] ^ te2[(s3 >> 8) & 0xFF] ^ te3[s0 & 0xFF] ^ r1
+            t2 = te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xFF] ^ te2[(s0 >> 8) & 0xFF] ^ te3[s1 & 0xFF] ^ r2
+            t3 = te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xFF] ^ te2[(s1 >> 8) & 0xFF] ^ te3[s2 & 0xFF] ^ r3
+            s0, s1, s2, s3 = t0, t1, t2, t3
+
+        o0 = s0_[s0 >> 24] ^ s1_[(s1 >> 16) & 0xFF] ^ s2_[(s2 >> 8) & 0xFF] ^ s3_[s3 & 0xFF] ^ f0
+        o1 = s0_[s1 >> 24] ^ s1_[(s2 >> 16) & 0xFF] ^ s2_[(s3 >> 8) & 0xFF] ^ s3_[s0 & 0xFF] ^ f1
+        o2 = s0_[s2 >> 24] ^ s1_[(s3 >> 16) & 0xFF] ^ s2_[(s0 >> 8) & 0xFF] ^ s3_[s1 & 0xFF] ^ f2
+        o3 = s0_[s3 >> 24] ^ s1_[(s0 >> 16) & 0xFF] ^ s2_[(s1 >> 8) & 0xFF] ^ s3_[s2 & 0xFF] ^ f3
+        pack_into(out, out_offset + offset, o0, o1, o2, o3)
+        if chained:
+            p0, p1, p2, p3 = o0, o1, o2, o3
+
+    return length
+
+
+def encrypt_blocks(buffer, round_keys): # round_keys to lista słów albo KeySchedule
+    out = bytearray(len(buffer))
+    encrypt_blocks_into(buffer, round_keys, out)
+    return bytes(out)
+
+
+def decrypt_blocks_into(buffer, round_keys, out, out_offset=0, length=None, chain=None):
+    # odwrotność encrypt_blocks_into; chain = blok szyfrogramu poprzedzający 'buffer' (IV) -> deszyfrowanie CBC
+    if length is None:
+        length = len(buffer)
+    if length % 16 != 0:
+        raise ValueError("Długość danych musi być wielokrotnością 16 bajtów.")
+    round_keys = getattr(round_keys, 'decrypt_round_keys', round_keys)
+
+    rounds = len(round_keys) // 4 - 1
+    td0, td1, td2, td3 = TD0, TD1, TD2, TD3
+    s0_, s1_, s2_, s3_ = IS0, IS1, IS2, IS3
+    unpack_from = _BLOCK.unpack_from
+    pack_into = _BLOCK.pack_into
+    k0, k1, k2, k3 = round_keys[0:4]
+    middle = [tuple(round_keys[4 * r:4 * r + 4]) for r in range(1, rounds)]
+    f0, f1, f2, f3 = round_keys[4 * rounds:4 * rounds + 4]
+
+    chained = chain is not None
+    p0, p1, p2, p3 = unpack_from(chain, 0) if chained else (0, 0, 0, 0)
+
+    for offset in range(0, length, 16):
+        c0, c1, c2, c3 = unpack_from(buffer, offset)
+        s0 = c0 ^ k0
+        s1 = c1 ^ k1
+        s2 = c2 ^ k2
+        s3 = c3 ^ k3
+
+        for r0, r1, r2, r3 in middle:
+            t0 = td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xFF] ^ td2[(s2 >> 8) & 0xFF] ^ td3[s1 & 0xFF] ^ r0
+            t1 = td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xFF] ^ td2[(s3 >> 8) & 0xFF] ^ td3[s2 & 0xFF] ^ r1
+            t2 = td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xFF] ^ td2[(s0 >> 8) & 0xFF] ^ td3[s3 & 0xFF] ^ r2
+            t3 = td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xFF] ^ td2[(s1 >> 8) & 0xFF] ^ td3[s0 & 0xFF] ^ r3
+            s0, s1, s2, s3 = t0, t1, t2, t3
+
+        pack_into(
+            out, out_offset + offset,
+            s0_[s0 >> 24] ^ s1_[(s3 >> 16) & 0xFF] ^ s2_[(s2 >> 8) & 0xFF] ^ s3_[s1 & 0xFF] ^ f0 ^ p0,
+            s0_[s1 >> 24] ^ s1_[(s0 >> 16) & 0xFF] ^ s2_[(s3 >> 8) & 0xFF] ^ s3_[s2 & 0xFF] ^ f1 ^ p1,
+            s0_[s2 >> 24] ^ s1_[(s1 >> 16) & 0xFF] ^ s2_[(s0 >> 8) & 0xFF] ^ s3_[s3 & 0xFF] ^ f2 ^ p2,
+            s0_[s3 >> 24] ^ s1_[(s2 >> 16) & 0xFF] ^ s2_[(s1 >> 8) & 0xFF] ^ s3_[s0 & 0xFF] ^ f3 ^ p3,
+        )
+        if chained:
+            p0, p1, p2, p3 = c0, c1, c2, c3
+
+    return length
+
+
+def decrypt_blocks(buffer, round_keys): # round_keys to klucze z decryption_round_keys albo KeySchedule
+    out = bytearray(len(buffer))
+    decrypt_blocks_into(buffer, round_keys, out)
+    return bytes(out)
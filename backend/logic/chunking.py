@@ -0,0 +1,82 @@
+# Rozmiar kawałka pliku czytanego przez encryption_worker.
+# Małe kawałki to dużo wywołań i odczytów z narzutem na każde, duże kawałki to rzadkie i skokowe aktualizacje postępu.
+# chunk_size="auto" -> ChunkTuner mierzy czas wywołań na początku pliku: podwaja rozmiar kawałka, dopóki przepustowość
+# rośnie, a jedno wywołanie trwa krócej niż połowa odstępu między metrykami (0.1 s), potem zostaje przy najlepszym.
+
+METRIC_INTERVAL = 0.1 # s, co ile worker wysyła metric_update
+AUTO_START = 4 * 1024
+AUTO_MAX = 4 * 1024 * 1024
+AUTO_SAMPLES = 3 # wywołania mierzone dla każdego rozmiaru
+AUTO_MIN_GAIN = 0.05 # mniejszy zysk przepustowości nie uzasadnia większego kawałka
+AUTO_TUNE_FRACTION = 0.1 # strojenie najwyżej na pierwszych 10% pliku
+
+
+def align(size, unit):
+    # wielokrotność 'unit' (blok AES, pojemność bloku OAEP albo blok szyfrogramu RSA), co najmniej jeden blok
+    return max(unit, size - size % unit)
+
+
+def resolve_chunk_size(value, default, unit):
+    # wartość z AlgoConfig.chunk_size: None -> domyślna dla algorytmu, liczba -> wyrównana do bloku, "auto" -> None
+    if value == "auto":
+        return None
+    return align(int(value or default), unit)
+
+
+class ChunkTuner:
+    def __init__(self, unit, file_size, start=AUTO_START, max_size=AUTO_MAX, max_latency=METRIC_INTERVAL / 2,
+                 samples=AUTO_SAMPLES, tune_fraction=AUTO_TUNE_FRACTION):
+        self.unit = unit
+        self.size = align(start, unit)
+        self.max_size = align(min(max_size, max(file_size, unit)), unit)
+        self.max_latency = max_latency
+        self.samples = samples
+        self.budget = file_size * tune_fraction
+        self.done = False
+        self._best_size = None
+        self._best_rate = 0.0
+        self._spent = 0
+        self._reset()
+
+    def _reset(self):
+        self._bytes = 0
+        self._seconds = 0.0
+        self._calls = 0
+
+    def _finish(self):
+        self.size = self._best_size or self.size
+        self.done = True
+
+    def record(self, nbytes, seconds):
+        # czas jednego wywołania dla kawałka 'nbytes' -> rozmiar następnego kawałka
+        if self.done:
+            return self.size
+        self._bytes += nbytes
+        self._seconds += seconds
+        self._calls += 1
+        self._spent += nbytes
+        if self._calls < self.samples and self._spent < self.budget:
+            return self.size
+
+        latency = self._seconds / self._calls
+        rate = self._bytes / self._seconds if self._seconds > 0 else float('inf')
+        self._reset()
+
+        if latency > self.max_latency:
+            # wywołanie za długie na płynny postęp -> poprzedni rozmiar albo połowa obecnego
+            if self._best_size is not None or self.size == self.unit:
+                self._finish()
+            else:
+                self.size = align(self.size // 2, self.unit)
+        elif rate > self._best_rate * (1 + AUTO_MIN_GAIN):
+            self._best_size, self._best_rate = self.size, rate
+            if self.size * 2 > self.max_size:
+                self._finish()
+            else:
+                self.size = align(self.size * 2, self.unit)
+        else:
+            self._finish()
+
+        if self._spent >= self.budget and not self.done:
+            self._finish()
+        return self.size
@@ -0,0 +1,96 @@
+import mmap
+import os
+
+# Wejście / wyjście encryption_worker w trybie io_mode="mmap":
+# plik wejściowy zmapowany tylko do odczytu, kolejne kawałki to wycinki memoryview (bez nowego bytes na każdy odczyt),
+# plik wyjściowy zaalokowany od razu na docelowy rozmiar (posix_fallocate) i zapisywany przez os.pwrite pod znanym
+# przesunięciem, a na końcu przycięty do faktycznej długości (padding / tag mogą skrócić wynik względem szacunku).
+# Oba obiekty udają zwykły plik (read / write / seek), więc pętla workera jest taka sama w obu trybach.
+
+
+def preallocate(fd, size):
+    if size <= 0:
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError): # brak posix_fallocate (Windows, macOS) albo system plików bez fallocate
+        os.ftruncate(fd, size)
+
+
+class MappedInput:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # pustego pliku nie da się zmapować
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self._position = 0
+
+    def seek(self, position):
+        self._position = position
+
+    def read(self, size):
+        start = self._position
+        self._position = min(start + size, len(self._view))
+        return self._view[start:self._position]
+
+    def readinto(self, buffer):
+        # kopia z mapy do bufora (potokowy odczyt z wyprzedzeniem)
+        chunk = self.read(len(buffer))
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError: # wycinki (np. ostatni kawałek) jeszcze istnieją -> mapa zamknie się razem z nimi
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PreallocatedOutput:
+    def __init__(self, path, size):
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        preallocate(self._fd, size)
+        self._position = 0
+        self._end = 0
+
+    def seek(self, position):
+        self._position = position
+
+    def write(self, data):
+        # pwrite nie przesuwa wskaźnika pliku -> kilku piszących może współdzielić jeden deskryptor
+        view = memoryview(data)
+        written = 0
+        while written < len(view):
+            written += _pwrite(self._fd, view[written:], self._position + written)
+        self._position += written
+        self._end = max(self._end, self._position)
+        return written
+
+    def close(self):
+        if self._fd is not None:
+            os.ftruncate(self._fd, self._end)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET) # Windows
+    return os.write(fd, data)
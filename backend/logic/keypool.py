@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+from multiprocessing import Process, Queue, Event, Array, Lock
+from queue import Empty, Full
+
+try:
+    from functions import _RSA
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from functions import _RSA
+
+# Pula gotowych par kluczy RSA dla każdego rozmiaru klucza.
+# Osobny proces w tle generuje klucze od startu serwera i uzupełnia pulę, gdy workery je zabierają,
+# dzięki czemu wyścig RSA mierzy samo szyfrowanie, a nie szukanie liczb pierwszych.
+
+DEFAULT_TARGETS = {1024: 8, 2048: 4, 4096: 2} # docelowa liczba par kluczy w puli
+TAKE_TIMEOUT = 0.5
+
+
+class KeyPool:
+    def __init__(self, targets=None):
+        self.targets = dict(targets or DEFAULT_TARGETS)
+        self.sizes = sorted(self.targets)
+        self._queues = {size: Queue(maxsize=self.targets[size]) for size in self.sizes}
+        self._generated = Array('i', len(self.sizes), lock=False)
+        self._seconds = Array('d', len(self.sizes), lock=False)
+        self._lock = Lock()
+        self._stop = Event()
+        self._process = None
+
+    # do procesów (filler, worker RSA) trafiają tylko kolejki, tablice i blokada;
+    # żywy Process nie daje się zserializować przy starcie "spawn" (Windows, macOS)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_process'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+    def start(self):
+        if self._process is None or not self._process.is_alive():
+            self._stop.clear()
+            self._process = Process(target=_fill, args=(self,), daemon=True)
+            self._process.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    def depth(self, key_size):
+        try:
+            return self._queues[key_size].qsize()
+        except NotImplementedError: # macOS nie ma sem_getvalue
+            return -1
+
+    def take(self, key_size, timeout=TAKE_TIMEOUT):
+        # (public_key, private_key) albo None, jeśli pula dla tego rozmiaru jest pusta
+        queue = self._queues.get(key_size)
+        if queue is None:
+            return None
+        try:
+            return queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def stats(self):
+        result = {}
+        with self._lock:
+            for i, size in enumerate(self.sizes):
+                generated = self._generated[i]
+                seconds = self._seconds[i]
+                result[str(size)] = {
+                    "depth": self.depth(size),
+                    "target": self.targets[size],
+                    "generated": generated,
+                    "keys_per_second": round(generated / seconds, 4) if seconds > 0 else 0.0,
+                }
+        return result
+
+    def _most_needed(self):
+        # rozmiar z najmniej wypełnioną pulą (względem celu), None gdy wszystkie pule są pełne
+        best, best_fill = None, 1.0
+        for size in self.sizes:
+            fill = max(self.depth(size), 0) / self.targets[size]
+            if fill < best_fill:
+                best, best_fill = size, fill
+        return best
+
+
+def _fill(pool):
+    # niższy priorytet -> generowanie kluczy nie zabiera CPU procesom mierzonym w wyścigu
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+    while not pool._stop.is_set():
+        size = pool._most_needed()
+        if size is None:
+            pool._stop.wait(0.2)
+            continue
+
+        start = time.perf_counter()
+        keypair = _RSA.generate_keypair(size)
+        elapsed = time.perf_counter() - start
+
+        index = pool.sizes.index(size)
+        with pool._lock:
+            pool._generated[index] += 1
+            pool._seconds[index] += elapsed
+        try:
+            pool._queues[size].put(keypair, timeout=1.0)
+        except Full:
+            pass
+
+
+def take_keypair(pool, key_size):
+    # para kluczy z puli, a gdy pula jest pusta (albo jej nie ma) -> generowanie na miejscu
+    keypair = pool.take(key_size) if pool is not None else None
+    if keypair is None:
+        keypair = _RSA.generate_keypair(key_size)
+    return keypair
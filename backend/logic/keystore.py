@@ -0,0 +1,124 @@
+import hashlib
+import os
+import struct
+import sys
+
+try:
+    from functions import _RSA
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from functions import _RSA
+
+# Trwały magazyn par kluczy RSA na dysku: klucze wygenerowane raz przeżywają restart serwera i kolejne pomiary,
+# więc wyścig z kluczem 4096 bitów nie czeka kilku sekund na liczby pierwsze.
+# Katalog z RSA_KEYSTORE_DIR (domyślnie ./keystore), w nim podkatalog na rozmiar klucza i plik <id>.key na parę (0600).
+# Zapisywane są tylko klucze z wyścigów z key_source="stored".
+# Format pliku (big-endian): 'RSK1' | rozmiar klucza w bitach (2 B) | liczba czynników (1 B)
+#   | e, n, d, p_1 ... p_k jako długość (2 B) + bajty liczby. Parametry CRT (dp, dq, qinv, ...) liczy RSAPrivateKey przy wczytaniu.
+
+MAGIC = b'RSK1'
+_HEADER = struct.Struct('>4sHB')
+_LENGTH = struct.Struct('>H')
+MAX_KEYS_PER_SIZE = 16
+DEFAULT_DIR = "./keystore"
+
+
+def serialize_keypair(private_key):
+    key_size = private_key.n.bit_length()
+    parts = [_HEADER.pack(MAGIC, key_size, len(private_key.primes))]
+    for value in (private_key.e, private_key.n, private_key.d) + private_key.primes:
+        raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+        parts.append(_LENGTH.pack(len(raw)))
+        parts.append(raw)
+    return b''.join(parts)
+
+
+def deserialize_keypair(data):
+    # bajty z serialize_keypair -> ((e, n), RSAPrivateKey)
+    if len(data) < _HEADER.size:
+        raise ValueError("Uszkodzony plik klucza RSA.")
+    magic, key_size, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or count < 2:
+        raise ValueError("Uszkodzony plik klucza RSA.")
+    offset = _HEADER.size
+    values = []
+    for _ in range(3 + count):
+        if offset + _LENGTH.size > len(data):
+            raise ValueError("Uszkodzony plik klucza RSA.")
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        values.append(int.from_bytes(data[offset:offset + length], 'big'))
+        offset += length
+    e, n, d = values[:3]
+    private_key = _RSA.RSAPrivateKey(values[3:], e, d)
+    if private_key.n != n or n.bit_length() != key_size:
+        raise ValueError("Uszkodzony plik klucza RSA.")
+    return (e, n), private_key
+
+
+def key_id(public_key):
+    e, n = public_key
+    return hashlib.sha256(n.to_bytes((n.bit_length() + 7) // 8, 'big')).hexdigest()[:16]
+
+
+class KeyStore:
+    def __init__(self, directory=None, max_per_size=MAX_KEYS_PER_SIZE):
+        self.directory = directory or os.environ.get("RSA_KEYSTORE_DIR") or DEFAULT_DIR
+        self.max_per_size = max_per_size
+        self._cache = {} # (rozmiar, id) -> para kluczy, wczytywane dopiero przy pierwszym użyciu
+
+    def _size_dir(self, key_size):
+        return os.path.join(self.directory, str(key_size))
+
+    def ids(self, key_size):
+        try:
+            names = os.listdir(self._size_dir(key_size))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith(".key"))
+
+    def counts(self):
+        # liczba zapisanych par kluczy dla każdego rozmiaru
+        try:
+            sizes = [int(name) for name in os.listdir(self.directory) if name.isdigit()]
+        except FileNotFoundError:
+            return {}
+        return {str(size): len(self.ids(size)) for size in sorted(sizes)}
+
+    def load(self, key_size, kid):
+        keypair = self._cache.get((key_size, kid))
+        if keypair is None:
+            with open(os.path.join(self._size_dir(key_size), f"{kid}.key"), "rb") as f:
+                keypair = deserialize_keypair(f.read())
+            self._cache[(key_size, kid)] = keypair
+        return keypair
+
+    def save(self, keypair):
+        # zwraca id zapisanego klucza albo None, gdy dla tego rozmiaru jest już max_per_size kluczy
+        public_key, private_key = keypair
+        key_size = private_key.n.bit_length()
+        if len(self.ids(key_size)) >= self.max_per_size:
+            return None
+        kid = key_id(public_key)
+        size_dir = self._size_dir(key_size)
+        os.makedirs(size_dir, mode=0o700, exist_ok=True)
+        path = os.path.join(size_dir, f"{kid}.key")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # plik zawiera klucz prywatny (d i czynniki) -> tylko dla właściciela, niezależnie od umask
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(serialize_keypair(private_key))
+        os.replace(tmp_path, path) # zapis atomowy -> inny proces nie wczyta połowy pliku
+        self._cache[(key_size, kid)] = keypair
+        return kid
+
+    def take(self, key_size, primes=2):
+        # zapisana para kluczy danego rozmiaru (pierwsza z pasującą liczbą czynników) albo None
+        for kid in self.ids(key_size):
+            try:
+                keypair = self.load(key_size, kid)
+            except (OSError, ValueError):
+                continue
+            if len(keypair[1].primes) == primes:
+                return keypair
+        return None
@@ -1,14 +1,18 @@
 import asyncio
 import time
-from multiprocessing import Process, Manager
+from multiprocessing import Process
 from .workers import encryption_worker
+from .segmented import segmentable, segmented_worker
+from .results import ResultTable
 
 
-async def process_queue_task(session_id, file_ids, config, metric_queue, stop_event, active_processes, websocket, sessions_db, next_file_event):
+async def process_queue_task(session_id, file_ids, config, metric_queue, stop_event, active_processes, websocket, sessions_db, next_file_event, key_pool=None, key_store=None, executor=None, active_tasks=None, executor_workers=None):
     start_time = time.time()
+    if active_tasks is None:
+        active_tasks = []
 
-    with Manager() as manager:
-        shared_stats = manager.list()
+    # wyniki workerów w tabeli we wspólnej pamięci (plik x algorytm), bez osobnego procesu Manager()
+    with ResultTable(len(file_ids)) as results:
 
         for index, f_id in enumerate(file_ids):
             await next_file_event.wait()
@@ -18,21 +22,30 @@ async def process_queue_task(session_id, file_ids, config, metric_queue, stop_ev
             if not file_path:
                 continue
 
-            p_aes = Process(target=encryption_worker,
-                            args=("AES", f_id, file_path, config['aes'], metric_queue, stop_event, shared_stats))
+            # AES w trybie segmentowym: jeden plik na całej puli procesów serwera zamiast jednego procesu
+            aes_task = None
+            if executor is not None and segmentable(config['aes']):
+                aes_task = asyncio.create_task(segmented_worker(
+                    executor, "AES", f_id, file_path, config['aes'], metric_queue, stop_event, results.slot(index, "AES"),
+                    executor_workers))
+                active_tasks.append(aes_task) # NEXT_FILE / STOP_ALL anulują zadanie jak terminate() procesy
+            else:
+                p_aes = Process(target=encryption_worker,
+                                args=("AES", f_id, file_path, config['aes'], metric_queue, stop_event, results.slot(index, "AES")))
+                active_processes.append(p_aes)
             p_rsa = Process(target=encryption_worker,
-                            args=("RSA", f_id, file_path, config['rsa'], metric_queue, stop_event, shared_stats))
+                            args=("RSA", f_id, file_path, config['rsa'], metric_queue, stop_event, results.slot(index, "RSA"), key_pool, key_store))
+            active_processes.append(p_rsa)
+            for p in active_processes:
+                p.start()
 
-            active_processes.extend([p_aes, p_rsa])
-            p_aes.start()
-            p_rsa.start()
-
-            while any(p.is_alive() for p in active_processes):
+            while any(p.is_alive() for p in active_processes) or any(not t.done() for t in active_tasks):
                 await asyncio.sleep(0.5)
                 if stop_event.is_set():
                     break
 
             active_processes.clear()
+            active_tasks.clear()
 
             if stop_event.is_set():
                 break
@@ -44,17 +57,22 @@ async def process_queue_task(session_id, file_ids, config, metric_queue, stop_ev
         avg_throughput = 0
         avg_cpu = 0
 
-        if len(shared_stats) > 0:
-            total_throughput = sum(item['throughput'] for item in shared_stats)
-            total_cpu = sum(item['cpu_usage'] for item in shared_stats)
-            avg_throughput = total_throughput / len(shared_stats)
-            avg_cpu = total_cpu / len(shared_stats)
+        finished = results.finished()
+        if len(finished) > 0:
+            total_throughput = sum(item['throughput'] for item in finished)
+            total_cpu = sum(item['cpu_usage'] for item in finished)
+            avg_throughput = total_throughput / len(finished)
+            avg_cpu = total_cpu / len(finished)
 
         summary = {
             "total_time": round(total_time, 2),
             "total_files": len(file_ids),
             "average_throughput": round(avg_throughput, 2),
-            "average_cpu_usage": round(avg_cpu, 2)
+            "average_cpu_usage": round(avg_cpu, 2),
+            "files": [
+                {"file_id": f_id, "aes": results.read(index, "AES"), "rsa": results.read(index, "RSA")}
+                for index, f_id in enumerate(file_ids)
+            ]
         }
 
         await websocket.send_json({
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+# Potokowe wejście / wyjście encryption_worker (pipeline=True w AlgoConfig).
+# Wątek czytający wypełnia z wyprzedzeniem pierścień buforów wielokrotnego użytku, wątek piszący opróżnia zaszyfrowane
+# bufory na dysk, a wątek główny tylko szyfruje. Slot pierścienia (bufor wejściowy + wyjściowy) wraca do puli dopiero
+# po zapisie, więc żaden bufor nie jest nadpisany, zanim jego dane trafią do pliku.
+# read_time / write_time to czas spędzony w odczycie i zapisie przez wątki I/O, osobno od czasu szyfrowania.
+
+DEFAULT_DEPTH = 4
+_END = None
+
+
+class _Slot:
+    __slots__ = ('input', 'output')
+
+    def __init__(self, size):
+        self.input = bytearray(size)
+        self.output = bytearray(size + 16) # update_into może oddać do 15 bajtów z poprzedniego kawałka
+
+
+class Pipeline:
+    def __init__(self, f_in, f_out, chunk_size, total, depth=DEFAULT_DEPTH):
+        depth = max(1, depth or DEFAULT_DEPTH)
+        self.chunk_size = chunk_size # wątek główny może zmienić (ChunkTuner), czytający bierze przy kolejnym odczycie
+        self.read_time = 0.0
+        self.write_time = 0.0
+        self._f_in = f_in
+        self._f_out = f_out
+        self._remaining = total
+        self._free = queue.Queue()
+        self._filled = queue.Queue()
+        self._to_write = queue.Queue()
+        self._error = None
+        self._stopped = threading.Event()
+        for _ in range(depth):
+            self._free.put(_Slot(chunk_size))
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    def _read_loop(self):
+        readinto = getattr(self._f_in, 'readinto', None)
+        try:
+            while self._remaining > 0 and not self._stopped.is_set():
+                slot = self._free.get()
+                if slot is _END:
+                    break
+                size = min(self.chunk_size, self._remaining)
+                if len(slot.input) < size:
+                    slot.input = bytearray(size)
+                    slot.output = bytearray(size + 16)
+                start = time.perf_counter()
+                view = memoryview(slot.input)[:size]
+                count = readinto(view) if readinto is not None else _copy_into(self._f_in.read(size), view)
+                self.read_time += time.perf_counter() - start
+                if not count:
+                    break
+                self._remaining -= count
+                self._filled.put((slot, view[:count]))
+        except Exception as e:
+            self._error = e
+        finally:
+            self._filled.put(_END)
+
+    def _write_loop(self):
+        try:
+            while True:
+                item = self._to_write.get()
+                if item is _END:
+                    break
+                slot, data = item
+                start = time.perf_counter()
+                self._f_out.write(data)
+                self.write_time += time.perf_counter() - start
+                self._free.put(slot)
+        except Exception as e:
+            self._error = e
+            self._free.put(_END) # czytający nie czeka na slot, który już nie wróci
+
+    def next_chunk(self):
+        # (slot, memoryview z danymi) albo (None, None) na końcu pliku
+        item = self._filled.get()
+        if self._error is not None:
+            raise self._error
+        if item is _END:
+            return None, None
+        return item
+
+    def write(self, slot, data):
+        # data może wskazywać na slot.output -> slot wraca do pierścienia dopiero po zapisie
+        if self._error is not None:
+            raise self._error
+        self._to_write.put((slot, data))
+
+    def finish(self):
+        # czeka na zapis wszystkich oddanych kawałków (przed finalize() i tagiem)
+        self._to_write.put(_END)
+        self._writer.join()
+        self._reader.join()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self):
+        self._stopped.set()
+        self._free.put(_END)
+        self._to_write.put(_END)
+
+
+def _copy_into(data, view):
+    view[:len(data)] = data
+    return len(data)
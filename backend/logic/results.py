@@ -0,0 +1,78 @@
+import struct
+from multiprocessing import shared_memory
+
+# Tabela wyników wyścigu we wspólnej pamięci (zamiast listy przez Manager(), który startował osobny proces serwera).
+# Stały układ: plik x algorytm, każdy wiersz to
+#   przepustowość (B/s), CPU (%), przetworzone bajty, czas (s), status
+# Worker zapisuje tylko swój wiersz (ResultSlot), a process_queue_task czyta całą tabelę bez żadnego IPC w obie strony.
+
+ALGORITHMS = ("AES", "RSA")
+STATUS_EMPTY, STATUS_DONE, STATUS_SKIPPED, STATUS_ERROR = 0, 1, 2, 3
+STATUS_NAMES = {STATUS_DONE: "done", STATUS_SKIPPED: "skipped", STATUS_ERROR: "error"}
+_ROW = struct.Struct("<ddqdB7x")
+
+
+def _attach(name):
+    # bez rejestracji w resource_tracker procesu potomnego -> segment usuwa tylko właściciel (Python 3.13+ ma track=False)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class ResultSlot:
+    # wiersz jednego workera; przekazywany do procesu jako nazwa segmentu i przesunięcie, więc łatwo go zserializować
+    __slots__ = ("name", "offset")
+
+    def __init__(self, name, offset):
+        self.name = name
+        self.offset = offset
+
+    def write(self, throughput, cpu_usage, processed_bytes, total_time, status=STATUS_DONE):
+        shm = _attach(self.name)
+        try:
+            _ROW.pack_into(shm.buf, self.offset, throughput, cpu_usage, processed_bytes, total_time, status)
+        finally:
+            shm.close()
+
+
+class ResultTable:
+    def __init__(self, num_files):
+        self.num_files = num_files
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, num_files * len(ALGORITHMS)) * _ROW.size)
+        self._shm.buf[:] = bytes(len(self._shm.buf)) # na macOS / Windows segment nie musi być wyzerowany
+
+    def _offset(self, file_index, algo):
+        return (file_index * len(ALGORITHMS) + ALGORITHMS.index(algo)) * _ROW.size
+
+    def slot(self, file_index, algo):
+        return ResultSlot(self._shm.name, self._offset(file_index, algo))
+
+    def read(self, file_index, algo):
+        throughput, cpu_usage, processed_bytes, total_time, status = _ROW.unpack_from(self._shm.buf, self._offset(file_index, algo))
+        if status == STATUS_EMPTY:
+            return None
+        return {
+            "throughput": round(throughput, 2),
+            "cpu_usage": round(cpu_usage, 2),
+            "processed_bytes": processed_bytes,
+            "total_time": round(total_time, 4),
+            "status": STATUS_NAMES.get(status, "error"),
+        }
+
+    def finished(self):
+        # wiersze zakończone powodzeniem -> średnie w podsumowaniu (jak wcześniej wpisy w shared_stats)
+        rows = (self.read(i, algo) for i in range(self.num_files) for algo in ALGORITHMS)
+        return [row for row in rows if row is not None and row["status"] == "done"]
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,11 +1,24 @@
 from pydantic import BaseModel
-from typing import Optional, List, Literal
+from typing import Optional, List, Literal, Union
 
 class AlgoConfig(BaseModel):
     key_size: int
     mode: Optional[str] = None
     padding: Optional[str] = None
-    implementation: Optional[Literal["our", "library"]] = "our"
+    implementation: Optional[Literal["our", "our-numpy", "library"]] = "our"
+    direction: Optional[Literal["ENCRYPT", "DECRYPT"]] = "ENCRYPT"
+    keygen: Optional[Literal["pool", "sequential", "parallel"]] = "pool"
+    key_source: Optional[Literal["stored", "fresh"]] = "fresh" # "stored" -> para kluczy z magazynu na dysku (keystore)
+    workers: Optional[int] = None
+    primes: Optional[int] = 2
+    chunk_size: Optional[Union[int, Literal["auto"]]] = None # bajty na wywołanie, None -> domyślny dla algorytmu
+    io_mode: Optional[Literal["buffered", "mmap"]] = "buffered" # "mmap" -> wejście zmapowane, wyjście zaalokowane z góry (pwrite)
+    pipeline: Optional[bool] = False # odczyt / zapis w osobnych wątkach, pierścień queue_depth buforów
+    queue_depth: Optional[int] = 4
+    segmented: Optional[bool] = False # AES: segmenty jednego pliku na puli procesów serwera (ECB, GCM, deszyfrowanie CBC)
+    segment_size: Optional[int] = None
+    hybrid_mode: Optional[Literal["GCM", "CBC"]] = "GCM" # RSA mode="HYBRID": tryb AES dla treści pliku
+    hybrid_key_size: Optional[int] = 256
 
 class RaceConfig(BaseModel):
     aes: AlgoConfig
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import sys
+import time
+
+try:
+    from functions import _registry
+    from functions._parallel import FileJob, FILE_SEGMENT_SIZE, _file_segment
+    from functions._endpoint import new_cipher
+except ImportError:
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from functions import _registry
+    from functions._parallel import FileJob, FILE_SEGMENT_SIZE, _file_segment
+    from functions._endpoint import new_cipher
+
+from .workers import EPSILON, encrypt_file
+from .results import STATUS_ERROR
+
+# AES jednego pliku rozłożony na pulę procesów z main.py (tryb "segmented" w AlgoConfig).
+# Segmenty pliku szyfrowane są równolegle przez FileJob, a ta korutyna w procesie serwera zbiera wyniki
+# i wysyła do kolejki te same komunikaty co encryption_worker (metric_update z postępem wszystkich segmentów, process_finished).
+# cpu_usage to czas CPU procesów z puli na segmenty tego pliku (100 na rdzeń, jak psutil.Process.cpu_percent w workerach),
+# więc równoległy worker RSA i proces uzupełniający pulę kluczy nie są liczone do AES.
+
+METRIC_INTERVAL = 0.1
+
+
+def segmentable(config):
+    # czy konfiguracja AES może iść przez segmenty: ECB, GCM (oba kierunki), CBC tylko deszyfrowanie
+    if not config.get("segmented") or config.get("implementation") == "library":
+        return False
+    mode = config.get("mode") or "ECB"
+    implementation = config.get("implementation") or "our"
+    if not _registry.has_engine('AES', mode, implementation):
+        return False
+    direction = (config.get("direction") or "ENCRYPT").upper()
+    return direction in _registry.get_engine('AES', mode, implementation).parallelizable
+
+
+async def _run_job(executor, job, stop_event, on_segment=None):
+    # prealokacja pliku i końcówka (zapis ECB / tag GCM z GHASH segmentów) w wątku -> pętla zdarzeń nie stoi
+    await asyncio.to_thread(job.prepare)
+    futures = [asyncio.wrap_future(executor.submit(_file_segment, *args)) for args in job.tasks()]
+    try:
+        for next_done in asyncio.as_completed(futures):
+            job.add_result(await next_done)
+            if stop_event.is_set():
+                return None
+            if on_segment is not None:
+                on_segment(len(futures))
+    finally:
+        for future in futures:
+            future.cancel()
+    return await asyncio.to_thread(job.finish)
+
+
+async def segmented_worker(executor, algo, file_id, file_path, config, queue, stop_event, result_slot=None, workers=None):
+    key_size = config.get("key_size", 128)
+    mode = config.get("mode") or "ECB"
+    implementation = config.get("implementation") or "our"
+    direction = (config.get("direction") or "ENCRYPT").upper()
+    segment_size = config.get("segment_size") or FILE_SEGMENT_SIZE
+    workers = workers or os.cpu_count()
+
+    output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.enc"
+    output_path = os.path.join(os.path.dirname(file_path), output_filename)
+
+    try:
+        cipher = new_cipher(key_size, f"AES_{mode}", implementation)
+        source_path = file_path
+        if direction == "DECRYPT":
+            # szyfrogram przygotowany przed startem zegara (CBC szyfruje się tylko sekwencyjnie)
+            source_path = output_path
+            if "ENCRYPT" in _registry.get_engine('AES', mode, cipher.implementation).parallelizable:
+                await _run_job(executor, FileJob(mode, "ENCRYPT", cipher.key, file_path, source_path, cipher.iv,
+                                                 implementation=cipher.implementation, segment_size=segment_size), stop_event)
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, encrypt_file, cipher.encryptor(), file_path, source_path)
+            if stop_event.is_set():
+                return
+            output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.dec"
+            output_path = os.path.join(os.path.dirname(file_path), output_filename)
+
+        job = FileJob(mode, direction, cipher.key, source_path, output_path, cipher.iv,
+                      implementation=cipher.implementation, segment_size=segment_size)
+        start_time = time.time()
+        last_metric_time = start_time
+        last_cpu_time = 0.0
+
+        def on_segment(total_segments):
+            # postęp liczony z wszystkich zakończonych segmentów, wysyłany nie częściej niż co METRIC_INTERVAL
+            nonlocal last_metric_time, last_cpu_time
+            current_time = time.time()
+            if current_time - last_metric_time < METRIC_INTERVAL:
+                return
+            elapsed = current_time - start_time
+            current_cpu = round((job.cpu_time - last_cpu_time) / (current_time - last_metric_time) * 100, 2)
+            last_cpu_time = job.cpu_time
+            queue.put({
+                "file_id": file_id,
+                "type": "metric_update",
+                "algorithm": algo,
+                "timestamp": int(current_time),
+                "data": {
+                    "progress": round(job.processed / max(job.body_size, 1) * 100, 2),
+                    "cpu_usage": current_cpu,
+                    "throughput": round(job.processed / elapsed, 2) if elapsed > 0 else 0,
+                    "processed_bytes": job.processed,
+                    "chunk_size": job.segment_size,
+                    "segments": total_segments,
+                    "workers": workers,
+                }
+            })
+            last_metric_time = current_time
+
+        await _run_job(executor, job, stop_event, on_segment)
+        if stop_event.is_set():
+            return
+
+        total_time = max(time.time() - start_time, EPSILON)
+        final_throughput = job.input_size / total_time
+        avg_cpu = round(job.cpu_time / total_time * 100, 2)
+
+        queue.put({
+            "file_id": file_id,
+            "type": "metric_update",
+            "algorithm": algo,
+            "timestamp": int(time.time()),
+            "data": {
+                "progress": 100.0,
+                "cpu_usage": avg_cpu,
+                "throughput": round(final_throughput, 2),
+                "processed_bytes": job.input_size,
+                "chunk_size": job.segment_size,
+                "workers": workers,
+            }
+        })
+
+        if result_slot is not None:
+            result_slot.write(final_throughput, avg_cpu, job.input_size, total_time)
+
+        queue.put({
+            "file_id": file_id,
+            "type": "process_finished",
+            "algorithm": algo,
+            "total_time": round(total_time, 2),
+            "download_url": f"/api/download/{output_filename}"
+        })
+
+    except Exception as e:
+        if result_slot is not None:
+            try:
+                result_slot.write(0.0, 0.0, 0, 0.0, STATUS_ERROR)
+            except FileNotFoundError: # tabela wyników już zamknięta (wyścig przerwany) -> zostaje pierwotny błąd
+                pass
+        queue.put({"type": "error", "algorithm": algo, "message": str(e)})
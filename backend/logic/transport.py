@@ -0,0 +1,80 @@
+import asyncio
+import threading
+
+# Metryki z workerów do WebSocketu bez odpytywania kolejki w pętli zdarzeń.
+# Wątek czytający blokuje się na multiprocessing.Queue.get() i przekazuje komunikaty do pętli przez call_soon_threadsafe,
+# a korutyna wysyłająca budzi się przy pierwszym komunikacie i wysyła wszystko, co zebrało się od poprzedniej ramki,
+# jako jedną ramkę {"type": "metric_batch", "messages": [...]} (pojedynczy komunikat idzie bez opakowania).
+# Z kilku metric_update dla tego samego pliku i algorytmu w jednej ramce zostaje tylko najnowszy.
+
+BATCH_INTERVAL = 0.05 # s, najkrótszy odstęp między ramkami dla jednego klienta
+_STOP = None
+
+
+def coalesce(messages):
+    # ostatni metric_update dla (file_id, algorithm) zostaje na swoim miejscu, wcześniejsze są pomijane;
+    # pozostałe komunikaty (process_finished, error) zawsze przechodzą w kolejności
+    seen = set()
+    kept = []
+    for msg in reversed(messages):
+        if msg.get("type") == "metric_update":
+            key = (msg.get("file_id"), msg.get("algorithm"))
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(msg)
+    kept.reverse()
+    return kept
+
+
+class MetricChannel:
+    def __init__(self, source_queue, send_json, interval=BATCH_INTERVAL):
+        self._source = source_queue
+        self._send_json = send_json
+        self._interval = interval
+        self._pending = []
+        self._ready = asyncio.Event()
+        self._loop = None
+        self._thread = None
+
+    def _push(self, msg):
+        self._pending.append(msg)
+        self._ready.set()
+
+    def _read(self):
+        # wątek czytający: blokujące get() poza pętlą zdarzeń
+        while True:
+            try:
+                msg = self._source.get()
+            except Exception: # kolejka zamknięta (koniec procesu)
+                break
+            if msg is _STOP:
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._push, msg)
+            except RuntimeError: # pętla już zamknięta
+                break
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                batch, self._pending = coalesce(self._pending), []
+                if len(batch) == 1:
+                    await self._send_json(batch[0])
+                elif batch:
+                    await self._send_json({"type": "metric_batch", "messages": batch})
+                await asyncio.sleep(self._interval) # komunikaty z tego okna trafią do następnej ramki
+        except Exception: # klient rozłączony w trakcie wysyłania
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._source.put(_STOP) # budzi wątek czytający zablokowany na get()
+        self._thread = None
@@ -4,15 +4,76 @@ import os
 import sys
 
 EPSILON = 1e-10
+RSA_DECRYPT_BLOCKS = 16 # bloki szyfrogramu RSA deszyfrowane w jednym wywołaniu (decrypt_batch)
+RSA_ENCRYPT_BLOCKS = 16 # pełne bloki OAEP w jednym wywołaniu / jednym zadaniu puli (jak RSA_BLOCKS_PER_TASK)
+HYBRID_CHUNK_SIZE = 64 * 1024 # tryb hybrydowy: treść pliku idzie przez strumieniowy AES
+HYBRID_HEADER_READ = 4096 # więcej niż najdłuższy nagłówek (klucz RSA 4096 bitów)
 
 try:
-    from functions._endpoint import what_to_run
+    from functions._endpoint import what_to_run, new_cipher, new_keypair, new_hybrid_encryptor, new_hybrid_decryptor, shutdown_pools
 except ImportError:
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from functions._endpoint import what_to_run
-
-
-def encryption_worker(algo, file_id, file_path, config, queue, stop_event, shared_stats=None):
+    from functions._endpoint import what_to_run, new_cipher, new_keypair, new_hybrid_encryptor, new_hybrid_decryptor, shutdown_pools
+
+from .chunking import ChunkTuner, resolve_chunk_size
+from .fileio import MappedInput, PreallocatedOutput
+from .pipeline import Pipeline
+from .results import STATUS_SKIPPED, STATUS_ERROR
+
+
+def encrypt_file(encryptor, source_path, target_path, chunk_size=64 * 1024):
+    # przygotowanie szyfrogramu przed pomiarem deszyfrowania, zwraca tag (GCM) albo None
+    with open(source_path, "rb") as f_in, open(target_path, "wb") as f_out:
+        while True:
+            chunk = f_in.read(chunk_size)
+            if not chunk:
+                break
+            f_out.write(encryptor.update(chunk))
+        f_out.write(encryptor.finalize())
+        tag = getattr(encryptor, "tag", None)
+        if tag:
+            f_out.write(tag)
+    return tag
+
+
+def encrypt_file_hybrid(encryptor, source_path, target_path, chunk_size=HYBRID_CHUNK_SIZE):
+    # nagłówek z miejscem na tag, treść szyfrowana AES, po finalize() tag GCM wpisany do nagłówka
+    with open(source_path, "rb") as f_in, open(target_path, "wb") as f_out:
+        f_out.write(encryptor.header)
+        while True:
+            chunk = f_in.read(chunk_size)
+            if not chunk:
+                break
+            f_out.write(encryptor.update(chunk))
+        f_out.write(encryptor.finalize())
+        if encryptor.tag:
+            f_out.seek(encryptor.tag_offset)
+            f_out.write(encryptor.tag)
+
+
+def rsa_capacity(key_size):
+    # bajty wiadomości w jednym bloku RSA-OAEP (SHA-256): k - 2 * 32 - 2
+    return max((key_size // 8) - 66, 1)
+
+
+def encrypt_file_rsa(public_key, key_size, source_path, target_path, chunk_size, workers=None):
+    # szyfrogram RSA przygotowany przed pomiarem deszyfrowania
+    with open(source_path, "rb") as f_in, open(target_path, "wb") as f_out:
+        while True:
+            chunk = f_in.read(chunk_size)
+            if not chunk:
+                break
+            f_out.write(what_to_run(chunk, key_size, "RSA_encrypt", key=public_key, workers=workers))
+
+
+def output_size_estimate(algo, direction, file_size, key_size, capacity=None, hybrid=False):
+    # górne ograniczenie rozmiaru pliku wynikowego (prealokacja w trybie mmap, nadmiar obcinany na końcu)
+    if algo == "RSA" and not hybrid:
+        return file_size if direction == "DECRYPT" else -(-file_size // capacity) * (key_size // 8)
+    return file_size + 32 + (HYBRID_HEADER_READ if hybrid else 0) # padding / tag / nagłówek hybrydowy
+
+
+def encryption_worker(algo, file_id, file_path, config, queue, stop_event, result_slot=None, key_pool=None, key_store=None):
     process = psutil.Process(os.getpid())
     process.cpu_percent(None)
     file_size = os.path.getsize(file_path)
@@ -25,29 +86,143 @@ def encryption_worker(algo, file_id, file_path, config, queue, stop_event, share
 
     key_size = config.get("key_size", 128)
     mode_raw = config.get("mode", "ECB")
-
+    implementation = config.get("implementation") or "our"
+    direction = (config.get("direction") or "ENCRYPT").upper()
+    keygen = config.get("keygen") or "pool"
+    keygen_time = None
+    workers = config.get("workers")
+    rsa_blocks = 0
+    hybrid = algo == "RSA" and (config.get("mode") or "").upper() == "HYBRID"
+    pipeline = None
+    read_time = encrypt_time = write_time = 0.0 # s w odczycie, szyfrowaniu i zapisie (I/O vs CPU)
+
+    # chunk_size: domyślny dla algorytmu, z konfiguracji (wyrównany do 'unit') albo "auto" (ChunkTuner)
     if algo == "AES":
         mode_str = f"AES_{mode_raw}"
-#         chunk_size = 64 * 1024
         chunk_size = 512
+        unit = 16
     else:
         mode_str = "RSA_encrypt"
-
-        chunk_size = (key_size // 8) - 64
-        if chunk_size <= 0: chunk_size = 32
+        # kawałek pliku to wielokrotność pojemności bloku OAEP -> każdy blok (poza ostatnim w pliku) jest pełny
+        capacity = rsa_capacity(key_size)
+        chunk_size = capacity * RSA_ENCRYPT_BLOCKS
+        if workers and workers > 1:
+            # jedno zadanie (RSA_ENCRYPT_BLOCKS bloków) na każdy proces puli -> encrypt_parallel naprawdę się rozkłada
+            chunk_size *= workers
+        unit = capacity
+        if hybrid:
+            mode_str = "RSA_HYBRID"
+            chunk_size = HYBRID_CHUNK_SIZE
+            unit = 16
 
 
     output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.enc"
     output_path = os.path.join(os.path.dirname(file_path), output_filename)
 
     try:
-        with open(file_path, "rb") as f_in, open(output_path, "wb") as f_out:
+        # AES: jeden kontekst na cały plik (klucz, IV, łańcuch CBC / licznik GCM przechodzą między kawałkami)
+        stream = None
+        public_key = None
+        private_key = None
+        source_path = file_path
+        body_offset = 0
+        if algo == "AES":
+            cipher = new_cipher(key_size, mode_str, implementation)
+            if direction == "DECRYPT":
+                # szyfrogram powstaje przed startem zegara -> mierzony jest tylko czas deszyfrowania
+                source_path = output_path
+                cipher.tag = encrypt_file(cipher.encryptor(), file_path, source_path)
+                file_size = os.path.getsize(source_path) - (len(cipher.tag) if cipher.tag else 0)
+                output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.dec"
+                output_path = os.path.join(os.path.dirname(file_path), output_filename)
+                stream = cipher.decryptor()
+                start_time = time.time()
+                last_metric_time = start_time
+            else:
+                stream = cipher.encryptor()
+        else:
+            # RSA: jedna para kluczy na plik, zapisana na dysku (key_source="stored"), z puli albo generowana
+            # (sekwencyjnie / równolegle, 2-4 czynniki); czas raportowany osobno i nie wlicza się do przepustowości szyfrowania
+            primes = config.get("primes") or 2
+            keypair = None
+            use_store = config.get("key_source") == "stored" and key_store is not None
+            if use_store:
+                keypair = key_store.take(key_size, primes)
+            if keypair is None:
+                if keygen == "pool" and primes == 2:
+                    from .keypool import take_keypair # _RSA tylko w workerze RSA, nie przy imporcie modułu
+                    keypair = take_keypair(key_pool, key_size)
+                else: # pula trzyma tylko klucze z dwoma czynnikami
+                    keypair = new_keypair(key_size, "sequential" if keygen == "pool" else keygen, workers, primes)
+                if use_store:
+                    key_store.save(keypair) # klucz prywatny trafia na dysk tylko na życzenie (key_source="stored")
+            public_key, private_key = keypair
+            keygen_time = time.time() - start_time
+            if hybrid:
+                # RSA-KEM + AES: klucz AES opakowany raz (w mierzonym czasie), treść pliku szyfrowana strumieniowo
+                hybrid_mode = config.get("hybrid_mode") or "GCM"
+                hybrid_key_size = config.get("hybrid_key_size") or 256
+                if direction == "DECRYPT":
+                    source_path = output_path
+                    encrypt_file_hybrid(new_hybrid_encryptor(public_key, hybrid_mode, hybrid_key_size, implementation), file_path, source_path)
+                    output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.dec"
+                    output_path = os.path.join(os.path.dirname(file_path), output_filename)
+                    start_time = time.time()
+                    with open(source_path, "rb") as f_head:
+                        stream = new_hybrid_decryptor(private_key, f_head.read(HYBRID_HEADER_READ), implementation)
+                    body_offset = stream.header_len
+                    file_size = os.path.getsize(source_path) - body_offset
+                else:
+                    start_time = time.time()
+                    stream = new_hybrid_encryptor(public_key, hybrid_mode, hybrid_key_size, implementation)
+            elif direction == "DECRYPT":
+                # deszyfrowanie kluczem prywatnym (CRT) -> szyfrogram przygotowany poza pomiarem,
+                # czytany po RSA_DECRYPT_BLOCKS pełnych blokach naraz
+                source_path = output_path
+                encrypt_file_rsa(public_key, key_size, file_path, source_path, chunk_size, workers)
+                file_size = os.path.getsize(source_path)
+                mode_str = "RSA_decrypt"
+                capacity = key_size // 8 # jeden blok szyfrogramu = k bajtów
+                chunk_size = capacity * RSA_DECRYPT_BLOCKS
+                unit = capacity
+                output_filename = f"{os.path.basename(file_path)}_{algo.lower()}.dec"
+                output_path = os.path.join(os.path.dirname(file_path), output_filename)
+            if not hybrid:
+                start_time = time.time()
+            last_metric_time = start_time
+
+        tuner = None
+        chunk_size = resolve_chunk_size(config.get("chunk_size"), chunk_size, unit)
+        if chunk_size is None:
+            tuner = ChunkTuner(unit, file_size)
+            chunk_size = tuner.size
+
+        # io_mode="mmap": wejście jako wycinki memoryview zmapowanego pliku, wyjście zaalokowane z góry i pisane przez pwrite;
+        # AES zapisuje wtedy do jednego bufora wielokrotnego użytku (update_into) zamiast nowego obiektu na kawałek
+        mapped = config.get("io_mode") == "mmap"
+        if mapped:
+            f_in_ctx = MappedInput(source_path)
+            f_out_ctx = PreallocatedOutput(output_path, output_size_estimate(algo, direction, file_size, key_size, capacity if algo == "RSA" else None, hybrid))
+        else:
+            f_in_ctx = open(source_path, "rb")
+            f_out_ctx = open(output_path, "wb")
+        out_buffer = bytearray()
+
+        with f_in_ctx as f_in, f_out_ctx as f_out:
+            if hybrid and direction != "DECRYPT":
+                f_out.write(stream.header)
+            f_in.seek(body_offset)
+            if config.get("pipeline"):
+                # odczyt z wyprzedzeniem i zapis w osobnych wątkach, wątek główny tylko szyfruje
+                pipeline = Pipeline(f_in, f_out, chunk_size, file_size, config.get("queue_depth"))
             while processed_bytes < file_size:
                 if stop_event.is_set():
+                    if pipeline is not None:
+                        pipeline.stop()
                     return
 
                 elapsed_total = time.time() - start_time
-                if algo == "RSA" and elapsed_total > 120:
+                if algo == "RSA" and not hybrid and elapsed_total > 120:
                     queue.put({
                         "file_id": file_id,
                         "type": "process_finished",
@@ -55,33 +230,59 @@ def encryption_worker(algo, file_id, file_path, config, queue, stop_event, share
                         "status": "skipped",
                         "message": "Limit 120s przekroczony (RSA)"
                     })
+                    if result_slot is not None:
+                        result_slot.write(processed_bytes / elapsed_total if elapsed_total > 0 else 0, 0.0, processed_bytes, elapsed_total, STATUS_SKIPPED)
+                    if pipeline is not None:
+                        pipeline.stop()
                     return
 
-                chunk = f_in.read(chunk_size)
-                if not chunk:
-                    break
-
-
+                call_start = time.perf_counter()
+                if pipeline is not None:
+                    slot, chunk = pipeline.next_chunk()
+                    if chunk is None:
+                        break
+                else:
+                    chunk = f_in.read(min(chunk_size, file_size - processed_bytes))
+                    read_time += time.perf_counter() - call_start
+                    if not chunk:
+                        break
+
+                crypt_start = time.perf_counter()
                 try:
-                    if algo == "AES" and mode_raw in ["ECB", "CBC"]:
-                        pad_len = 16 - (len(chunk) % 16)
-                        if pad_len != 16:
-                            chunk += b'\0' * pad_len
-
-
-                    result_tuple = what_to_run(chunk, key_size, mode_str)
-
-                    if isinstance(result_tuple, tuple):
-                        encrypted_data = result_tuple[0]
+                    if stream is not None and pipeline is not None:
+                        encrypted_data = memoryview(slot.output)[:stream.update_into(chunk, slot.output)]
+                    elif stream is not None and mapped:
+                        if len(out_buffer) < len(chunk) + 16:
+                            out_buffer = bytearray(len(chunk) + 16)
+                        encrypted_data = memoryview(out_buffer)[:stream.update_into(chunk, out_buffer)]
+                    elif stream is not None:
+                        encrypted_data = stream.update(chunk)
                     else:
-                        encrypted_data = result_tuple
-
-                    f_out.write(encrypted_data)
+                        key = private_key if mode_str == "RSA_decrypt" else public_key
+                        result_tuple = what_to_run(chunk, key_size, mode_str, implementation, key=key, workers=workers)
+                        rsa_blocks += -(-len(chunk) // capacity)
+
+                        if isinstance(result_tuple, tuple):
+                            encrypted_data = result_tuple[0]
+                        else:
+                            encrypted_data = result_tuple
+                    encrypt_time += time.perf_counter() - crypt_start
+
+                    if pipeline is not None:
+                        pipeline.write(slot, encrypted_data)
+                    else:
+                        write_start = time.perf_counter()
+                        f_out.write(encrypted_data)
+                        write_time += time.perf_counter() - write_start
 
                 except Exception as crypt_err:
                     raise Exception(f"Błąd funkcji {mode_str}: {str(crypt_err)}")
 
                 processed_bytes += len(chunk)
+                if tuner is not None:
+                    chunk_size = tuner.record(len(chunk), time.perf_counter() - call_start)
+                    if pipeline is not None:
+                        pipeline.chunk_size = chunk_size
 
                 current_time = time.time()
                 if current_time - last_metric_time >= 0.1:
@@ -92,20 +293,40 @@ def encryption_worker(algo, file_id, file_path, config, queue, stop_event, share
                     cpu_sum += current_cpu
                     cpu_count += 1
 
+                    metric_data = {
+                        "progress": round((processed_bytes / file_size) * 100, 2),
+                        "cpu_usage": current_cpu,
+                        "throughput": round(throughput, 2),
+                        "processed_bytes": processed_bytes,
+                        "chunk_size": chunk_size,
+                        "read_time": round(pipeline.read_time if pipeline is not None else read_time, 4),
+                        "encrypt_time": round(encrypt_time, 4),
+                        "write_time": round(pipeline.write_time if pipeline is not None else write_time, 4)
+                    }
+                    if algo == "RSA" and not hybrid:
+                        metric_data["blocks_per_second"] = round(rsa_blocks / elapsed, 2) if elapsed > 0 else 0
+                    if algo == "RSA" and key_pool is not None:
+                        metric_data["key_pool"] = key_pool.stats()
+
                     queue.put({
                         "file_id": file_id,
                         "type": "metric_update",
                         "algorithm": algo,
                         "timestamp": int(current_time),
-                        "data": {
-                            "progress": round((processed_bytes / file_size) * 100, 2),
-                            "cpu_usage": current_cpu,
-                            "throughput": round(throughput, 2),
-                            "processed_bytes": processed_bytes
-                        }
+                        "data": metric_data
                     })
                     last_metric_time = current_time
 
+            if pipeline is not None:
+                pipeline.finish() # wszystkie kawałki zapisane przed końcówką strumienia i tagiem
+                read_time, write_time = pipeline.read_time, pipeline.write_time
+            if stream is not None:
+                f_out.write(stream.finalize()) # padding PKCS#7 (ECB/CBC), ostatni niepełny blok (GCM), przy deszyfrowaniu weryfikacja
+                if direction != "DECRYPT" and getattr(stream, "tag", None):
+                    if hybrid:
+                        f_out.seek(stream.tag_offset) # tag GCM ma miejsce w nagłówku
+                    f_out.write(stream.tag)
+
         total_time = time.time() - start_time
         if total_time < EPSILON:
             total_time = EPSILON
@@ -119,26 +340,35 @@ def encryption_worker(algo, file_id, file_path, config, queue, stop_event, share
             avg_cpu = (cpu_sum / cpu_count)
 
         # Dla bardzo małych plików może nie być wysłany żaden update, więc wysyłamy końcowy tutaj
+        final_data = {
+            "progress": 100.0,
+            "cpu_usage": avg_cpu,
+            "throughput": round(final_throughput, 2),
+            "processed_bytes": processed_bytes,
+            "chunk_size": chunk_size,
+            "read_time": round(read_time, 4),
+            "encrypt_time": round(encrypt_time, 4),
+            "write_time": round(write_time, 4)
+        }
+        if algo == "RSA" and not hybrid:
+            final_data["blocks_per_second"] = round(rsa_blocks / total_time, 2)
+        if algo == "RSA" and key_pool is not None:
+            final_data["key_pool"] = key_pool.stats()
+        if algo == "RSA" and key_store is not None:
+            final_data["key_store"] = key_store.counts()
+        if keygen_time is not None:
+            final_data["keygen_time"] = round(keygen_time, 4)
+
         queue.put({
             "file_id": file_id,
             "type": "metric_update",
             "algorithm": algo,
             "timestamp": int(time.time()),
-            "data": {
-                "progress": 100.0,
-                "cpu_usage": avg_cpu,
-                "throughput": round(final_throughput, 2),
-                "processed_bytes": processed_bytes
-            }
+            "data": final_data
         })
 
-
-        if shared_stats is not None:
-            shared_stats.append({
-                "algorithm": algo,
-                "throughput": final_throughput,
-                "cpu_usage": avg_cpu
-            })
+        if result_slot is not None:
+            result_slot.write(final_throughput, avg_cpu, processed_bytes, total_time)
 
         queue.put({
             "file_id": file_id,
@@ -149,4 +379,10 @@ def encryption_worker(algo, file_id, file_path, config, queue, stop_event, share
         })
 
     except Exception as e:
-        queue.put({"type": "error", "algorithm": algo, "message": str(e)})
\ No newline at end of file
+        if pipeline is not None:
+            pipeline.stop()
+        if result_slot is not None:
+            result_slot.write(0.0, 0.0, processed_bytes, time.time() - start_time, STATUS_ERROR)
+        queue.put({"type": "error", "algorithm": algo, "message": str(e)})
+    finally:
+        shutdown_pools() # pule procesów OAEP / deszyfrowania nie zostają po workerze
\ No newline at end of file
@@ -4,6 +4,8 @@ import uuid
 import shutil
 import asyncio
 import sys
+import psutil
+from contextlib import asynccontextmanager
 from typing import List, Dict
 
 from fastapi import FastAPI, WebSocket, UploadFile, File, WebSocketDisconnect, HTTPException
@@ -20,13 +22,33 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from logic.schemas import StartRaceCommand
 from logic.menager import process_queue_task
+from logic.keypool import KeyPool
+from logic.keystore import KeyStore
+from logic.transport import MetricChannel
 from functions._endpoint import what_to_run
 from concurrent.futures import ProcessPoolExecutor
 
 
-executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+EXECUTOR_WORKERS = os.cpu_count()
+executor = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS)
 
-app = FastAPI()
+# pula par kluczy RSA uzupełniana w tle od startu serwera
+key_pool = KeyPool()
+
+# pary kluczy RSA zapisane na dysku (katalog z RSA_KEYSTORE_DIR), przeżywają restart serwera
+key_store = KeyStore()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    key_pool.start()
+    try:
+        yield
+    finally:
+        key_pool.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,9 +71,29 @@ def reset_executor():
     global executor
 
     executor.shutdown(wait=False, cancel_futures=True)
-    executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+    executor = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS)
 
-async def cleanup_processes(active_processes: List[Process], queue_manager_task: asyncio.Task):
+def terminate_process(p: Process):
+    # razem z procesami potomnymi workera (pule procesów keygen / OAEP), których terminate() rodzica nie zamyka
+    try:
+        children = psutil.Process(p.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    for child in children:
+        try:
+            child.kill()
+        except psutil.Error:
+            pass
+    p.terminate()
+
+def cancel_tasks(active_tasks: List[asyncio.Task]):
+    # segmentowy AES to zadanie asyncio w procesie serwera, a nie Process -> anulowane zamiast terminate()
+    for task in active_tasks:
+        if not task.done():
+            task.cancel()
+    active_tasks.clear()
+
+async def cleanup_processes(active_processes: List[Process], queue_manager_task: asyncio.Task, active_tasks: List[asyncio.Task]):
     if queue_manager_task and not queue_manager_task.done():
         queue_manager_task.cancel()
         try:
@@ -61,10 +103,11 @@ async def cleanup_processes(active_processes: List[Process], queue_manager_task:
 
     for p in active_processes:
         if p.is_alive():
-            p.terminate()
+            terminate_process(p)
             p.join(timeout=0.1)
 
     active_processes.clear()
+    cancel_tasks(active_tasks)
 
 def run_library_aes(data: bytes, key_size: int, mode_str: str) -> bytes:
     if key_size not in LIBRARY_KEYS_CACHE:
@@ -108,6 +151,16 @@ async def get_config():
     }
 
 
+@app.get("/api/keypool")
+async def get_key_pool():
+    return key_pool.stats()
+
+
+@app.get("/api/keystore")
+async def get_key_store():
+    return key_store.counts()
+
+
 async def remove_session_folder(session_id: str):
     await asyncio.sleep(900)
     if session_id in sessions_db:
@@ -169,20 +222,13 @@ async def websocket_endpoint(websocket: WebSocket):
     metric_queue = Queue()
     stop_event = Event()
     active_processes: List[Process] = []
+    active_tasks: List[asyncio.Task] = []
 
     is_processing = False
 
-    async def monitor_queue():
-        try:
-            while True:
-                while not metric_queue.empty():
-                    msg = metric_queue.get_nowait()
-                    await websocket.send_json(msg)
-                await asyncio.sleep(0.1)
-        except Exception:
-            pass
-
-    queue_task = asyncio.create_task(monitor_queue())
+    # komunikaty z workerów trafiają do pętli przez wątek czytający, a do klienta jako ramki zbiorcze
+    metric_channel = MetricChannel(metric_queue, websocket.send_json)
+    queue_task = asyncio.create_task(metric_channel.run())
 
     try:
 
@@ -219,7 +265,7 @@ async def websocket_endpoint(websocket: WebSocket):
                             if impl == "library":
                                 enc_frame = await loop.run_in_executor(None, run_library_aes, ready_data, ks, ms)
                             else:
-                                result = await loop.run_in_executor(executor, what_to_run, ready_data, ks, ms)
+                                result = await loop.run_in_executor(executor, what_to_run, ready_data, ks, ms, impl)
                                 enc_frame = result[0] if isinstance(result, tuple) else result
 
                             await websocket.send_bytes(enc_frame)
@@ -237,7 +283,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 command = raw_data.get("command")
 
                 if command == "START_WEBCAM":
-                    await cleanup_processes(active_processes, queue_manager_task)
+                    await cleanup_processes(active_processes, queue_manager_task, active_tasks)
 
                     current_session_id = raw_data.get("session_id")
                     if "config" in raw_data and "aes" in raw_data["config"]:
@@ -255,7 +301,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 elif command == "START_RACE":
                     current_session_id = raw_data.get("session_id")
 
-                    await cleanup_processes(active_processes, queue_manager_task)
+                    await cleanup_processes(active_processes, queue_manager_task, active_tasks)
 
                     if queue_manager_task and not queue_manager_task.done():
                         await websocket.send_json({"type": "error", "message": "Szyfrowanie już trwa!"})
@@ -276,7 +322,12 @@ async def websocket_endpoint(websocket: WebSocket):
                             active_processes,
                             websocket,
                             sessions_db,
-                            next_file_event
+                            next_file_event,
+                            key_pool,
+                            key_store,
+                            executor,
+                            active_tasks,
+                            EXECUTOR_WORKERS
                         ))
                     except Exception as e:
                         await websocket.send_json({"type": "error", "message": f"Błąd startu: {str(e)}"})
@@ -284,8 +335,9 @@ async def websocket_endpoint(websocket: WebSocket):
                 elif command == "NEXT_FILE":
                     for p in active_processes:
                         if p.is_alive():
-                            p.terminate()
+                            terminate_process(p)
                     active_processes.clear()
+                    cancel_tasks(active_tasks)
 
                     next_file_event.set()
 
@@ -295,8 +347,9 @@ async def websocket_endpoint(websocket: WebSocket):
                         queue_manager_task.cancel()
                     for p in active_processes:
                         if p.is_alive():
-                            p.terminate()
+                            terminate_process(p)
                     active_processes.clear()
+                    cancel_tasks(active_tasks)
                     await websocket.send_json({"type": "info", "message": "Zatrzymano procesy"})
 
                     reset_executor()
@@ -310,7 +363,8 @@ async def websocket_endpoint(websocket: WebSocket):
             queue_manager_task.cancel()
         for p in active_processes:
             if p.is_alive():
-                p.terminate()
+                terminate_process(p)
+        cancel_tasks(active_tasks)
 
         if current_session_id:
             session_path = os.path.join(TEMP_ROOT, current_session_id)
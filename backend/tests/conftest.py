@@ -0,0 +1,5 @@
+import os
+import sys
+
+# testy uruchamiane z katalogu backend/ albo z głównego katalogu repozytorium
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
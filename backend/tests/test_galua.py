@@ -0,0 +1,13 @@
+from functions import _galuaMath
+
+
+def test_tables_match_reference():
+    # wszystkie 65 536 iloczynów, tablice mulN i elementy odwrotne względem multiply()
+    assert _galuaMath.verify_tables()
+
+
+def test_inverse_table_known_values():
+    # przykład z FIPS-197: {53} * {ca} = {01}, a 0 przechodzi na 0 jak w S-boxie
+    assert _galuaMath.INV[0x00] == 0x00
+    assert _galuaMath.INV[0x01] == 0x01
+    assert _galuaMath.INV[0x53] == 0xca
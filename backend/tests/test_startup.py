@@ -0,0 +1,36 @@
+import subprocess
+import sys
+
+from functions import _benchmark
+
+MODE_MODULES = ('functions._AES_ECB', 'functions._AES_CBC', 'functions._AES_GCM', 'functions._RSA')
+
+
+def _loaded_after_import(module, candidates):
+    # które z podanych modułów są w sys.modules po zimnym imporcie w nowym procesie
+    code = f"import sys, {module}; print(','.join(m for m in {candidates!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=_benchmark._BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    return [m for m in result.stdout.strip().split(',') if m]
+
+
+def test_worker_import_budget():
+    # zimny import modułu workera w nowym procesie mieści się w limicie
+    elapsed = _benchmark.check_import_budget()
+    assert elapsed <= _benchmark.IMPORT_BUDGET
+
+
+def test_rsa_worker_import_budget():
+    # worker RSA dociąga pulę kluczy (i _RSA) przy pierwszym kluczu -> ten sam limit dla obu importów razem
+    elapsed = _benchmark.check_import_budget(f"{_benchmark.WORKER_MODULE}, logic.keypool")
+    assert elapsed <= _benchmark.IMPORT_BUDGET
+
+
+def test_endpoint_imports_engines_lazily():
+    # moduły trybów (z efektami ubocznymi przy imporcie) ładują się dopiero przy pierwszym użyciu
+    assert _loaded_after_import('functions._endpoint', MODE_MODULES) == []
+
+
+def test_worker_module_skips_rsa():
+    # worker AES nie płaci za _RSA (sito, OAEP) przy starcie
+    assert _loaded_after_import(_benchmark.WORKER_MODULE, MODE_MODULES) == []
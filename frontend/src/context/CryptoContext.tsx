@@ -11,6 +11,7 @@ import type {
   ControlCommand,
   FileRaceState,
   FileRaceStatus,
+  MetricBatchMessage,
   MetricDTO,
   StartRaceCommand,
   UploadedFile,
@@ -119,51 +120,58 @@ export const CryptoProcessProvider = ({
   useEffect(() => {
     if (!lastJsonMessage) return;
 
-    const msg = lastJsonMessage;
+    // Updates that arrive within one server tick come as a single "metric_batch" frame
+    const messages =
+      lastJsonMessage.type === "metric_batch"
+        ? (lastJsonMessage as MetricBatchMessage).messages
+        : [lastJsonMessage];
 
-    if (msg.type === "metric_update" && msg.data && msg.algorithm) {
-      updateRaceMetrics(msg.algorithm, msg.data);
-    }
+    for (const msg of messages) {
+      if (msg.type === "metric_update" && msg.data && msg.algorithm) {
+        updateRaceMetrics(msg.algorithm, msg.data);
+      }
 
-    if (msg.type === "process_finished" && msg.algorithm) {
-      console.log("Process finished received for algorithm:", msg);
+      if (msg.type === "process_finished" && msg.algorithm) {
+        console.log("Process finished received for algorithm:", msg);
 
-      completeAlgorithm(
-        msg.algorithm,
-        msg.download_url,
-        msg.total_time,
-        msg?.status,
-      );
-    }
+        completeAlgorithm(
+          msg.algorithm,
+          msg.download_url,
+          msg.total_time,
+          msg?.status,
+        );
+      }
 
-    if (msg.type === "file_completed") {
-      console.log("File complete received for file ID:", msg.file_id);
+      if (msg.type === "file_completed") {
+        console.log("File complete received for file ID:", msg.file_id);
 
-      if (currentFile && msg.file_id === currentFile.fileId) {
-        console.log("File ID matches current file. Processing next file.");
-        setIsFileProcessed(true);
+        if (currentFile && msg.file_id === currentFile.fileId) {
+          console.log("File ID matches current file. Processing next file.");
+          setIsFileProcessed(true);
 
-        completeProcessedFile(currentFile.fileId);
-      } else {
-        console.log("File ID does not match current file. Ignoring.");
+          completeProcessedFile(currentFile.fileId);
+        } else {
+          console.log("File ID does not match current file. Ignoring.");
+        }
       }
-    }
-
-    if (msg.type === "batch_complete" && msg.summary) {
-      // Prepare batch summary (content for the summary modal)
-      setBatchSummary({
-        total_time: msg.summary.total_time || 0,
-        total_files: msg.summary.total_files || 0,
-        average_throughput: msg.summary.average_throughput || 0,
-        average_cpu_usage: msg.summary.average_cpu_usage || 0,
-      });
 
-      // Set the status of the last file to processed
-      completeProcessedFile(currentFile.fileId);
+      if (msg.type === "batch_complete" && msg.summary) {
+        // Prepare batch summary (content for the summary modal)
+        setBatchSummary({
+          total_time: msg.summary.total_time || 0,
+          total_files: msg.summary.total_files || 0,
+          average_throughput: msg.summary.average_throughput || 0,
+          average_cpu_usage: msg.summary.average_cpu_usage || 0,
+          files: msg.summary.files || [],
+        });
+
+        // Set the status of the last file to processed
+        completeProcessedFile(currentFile.fileId);
 
-      // Process is not running now
-      setIsRunning(false);
-      disconnect();
+        // Process is not running now
+        setIsRunning(false);
+        disconnect();
+      }
     }
   }, [lastJsonMessage]);
 
@@ -11,11 +11,28 @@ export interface UploadedFile {
   size: number;
 }
 
+export type AlgorithmSummaryStatus = "done" | "skipped" | "error";
+
+export interface AlgorithmSummary {
+  throughput: number;
+  cpu_usage: number;
+  processed_bytes: number;
+  total_time: number;
+  status: AlgorithmSummaryStatus;
+}
+
+export interface FileSummary {
+  file_id: string;
+  aes: AlgorithmSummary | null;
+  rsa: AlgorithmSummary | null;
+}
+
 export interface BatchSummary {
   total_time: number;
   total_files: number;
   average_throughput: number;
   average_cpu_usage: number;
+  files?: FileSummary[];
 }
 
 export interface UploadResponse {
@@ -31,6 +48,22 @@ export type AesMode = (typeof AES_MODES)[number];
 
 export type AlgorithmMode = AesMode;
 
+export type AesImplementation = "library" | "our" | "our-numpy";
+
+export type CryptoDirection = "ENCRYPT" | "DECRYPT";
+
+// "mmap": memory-mapped input, preallocated output written with pwrite
+export type IoMode = "buffered" | "mmap";
+
+export type RsaKeygenMode = "pool" | "sequential" | "parallel";
+
+// "stored" reuses a keypair from the server's on-disk keystore
+export type RsaKeySource = "stored" | "fresh";
+
+// "HYBRID": RSA-OAEP wraps a random AES key once, the file body is encrypted with AES
+export type RsaMode = "OAEP" | "HYBRID";
+export type HybridAesMode = "GCM" | "CBC";
+
 export const AES_KEY_SIZES = [128, 192, 256] as const;
 export const RSA_KEY_SIZES = [1024, 2048, 4096] as const;
 
@@ -68,8 +101,33 @@ export interface StartRaceCommand {
   file_ids: string[];
 
   config: {
-    aes: { key_size: number; mode: AesMode };
-    rsa: { key_size: number };
+    aes: {
+      key_size: number;
+      mode: AesMode;
+      implementation?: AesImplementation;
+      direction?: CryptoDirection;
+      segmented?: boolean; // split one file across the server's process pool (ECB, GCM, CBC decrypt)
+      segment_size?: number;
+      chunk_size?: number | "auto";
+      io_mode?: IoMode;
+      pipeline?: boolean; // reader/writer threads around the encrypt loop
+      queue_depth?: number;
+    };
+    rsa: {
+      key_size: number;
+      keygen?: RsaKeygenMode;
+      key_source?: RsaKeySource;
+      workers?: number;
+      primes?: number;
+      direction?: CryptoDirection;
+      chunk_size?: number | "auto";
+      io_mode?: IoMode;
+      pipeline?: boolean; // reader/writer threads around the encrypt loop
+      queue_depth?: number;
+      mode?: RsaMode;
+      hybrid_mode?: HybridAesMode;
+      hybrid_key_size?: AesKeySize;
+    };
   };
 }
 
@@ -84,8 +142,33 @@ export interface StartRaceCommand {
   file_ids: string[];
 
   config: {
-    aes: { key_size: number; mode: AesMode };
-    rsa: { key_size: number };
+    aes: {
+      key_size: number;
+      mode: AesMode;
+      implementation?: AesImplementation;
+      direction?: CryptoDirection;
+      segmented?: boolean; // split one file across the server's process pool (ECB, GCM, CBC decrypt)
+      segment_size?: number;
+      chunk_size?: number | "auto";
+      io_mode?: IoMode;
+      pipeline?: boolean; // reader/writer threads around the encrypt loop
+      queue_depth?: number;
+    };
+    rsa: {
+      key_size: number;
+      keygen?: RsaKeygenMode;
+      key_source?: RsaKeySource;
+      workers?: number;
+      primes?: number;
+      direction?: CryptoDirection;
+      chunk_size?: number | "auto";
+      io_mode?: IoMode;
+      pipeline?: boolean; // reader/writer threads around the encrypt loop
+      queue_depth?: number;
+      mode?: RsaMode;
+      hybrid_mode?: HybridAesMode;
+      hybrid_key_size?: AesKeySize;
+    };
   };
 }
 
@@ -93,15 +176,35 @@ export interface StartWebcamCommand {
   command: "START_WEBCAM";
   session_id: string;
   config: {
-    aes: { key_size: number; mode: AesMode; implementation: "library" | "our" };
+    aes: { key_size: number; mode: AesMode; implementation: AesImplementation };
   };
 }
 
+export interface KeyPoolSizeStats {
+  depth: number;
+  target: number;
+  generated: number;
+  keys_per_second: number;
+}
+
+// keyed by RSA key size in bits
+export type KeyPoolStats = Record<string, KeyPoolSizeStats>;
+
 export interface MetricDTO {
   progress: number;
   cpu_usage: number;
   throughput: number;
   processed_bytes: number;
+  key_pool?: KeyPoolStats;
+  keygen_time?: number;
+  key_store?: Record<string, number>; // stored keypairs per RSA key size (GET /api/keystore)
+  chunk_size?: number; // bytes per call, the converged size when chunk_size is "auto"
+  read_time?: number; // seconds spent reading input
+  encrypt_time?: number; // seconds spent in the cipher
+  write_time?: number; // seconds spent writing output
+  blocks_per_second?: number; // RSA: OAEP blocks processed per second
+  segments?: number; // segmented AES: segments in the file
+  workers?: number; // segmented AES: pool processes
 }
 
 export interface AlgorithmRaceState {
@@ -128,3 +231,9 @@ export interface FileRaceState {
   aes: AlgorithmRaceState;
   rsa: AlgorithmRaceState & { status?: FileRaceStatus };
 }
+
+// Server-side coalesced frame: every message from one tick, at most one metric_update per file and algorithm
+export interface MetricBatchMessage {
+  type: "metric_batch";
+  messages: any[];
+}